@@ -1,8 +1,11 @@
-# src/market_data_pipeline/main.py
+# main.py
+import argparse
 import asyncio
+import logging
 import signal
-from datetime import datetime
-from typing import Dict, Set
+import time
+from functools import lru_cache
+from typing import Dict, Optional, Set
 from src.market_data_pipeline.data_ingestion.feed_simulator import MarketDataSimulator
 from src.market_data_pipeline.data_ingestion.feed_handler import FeedHandler
 from src.market_data_pipeline.order_book.models import OrderBookSnapshot
@@ -11,37 +14,54 @@ from src.market_data_pipeline.utils.logging import get_logger
 
 logger = get_logger(__name__)
 
+@lru_cache(maxsize=256)
+def _format_seconds(seconds: int) -> str:
+    """Format whole epoch seconds as local time; cached since prints share seconds."""
+    return time.strftime("%Y-%m-%d %H:%M:%S", time.localtime(seconds))
+
+def format_timestamp(timestamp: int) -> str:
+    """Format a nanosecond epoch timestamp with microsecond precision."""
+    seconds, nanos = divmod(timestamp, 1_000_000_000)
+    return f"{_format_seconds(seconds)}.{nanos // 1000:06d}"
+
 class MarketDataApp:
-    def __init__(self):
+    def __init__(self, enable_analytics: bool = True):
         self.symbols = ["AAPL", "MSFT", "GOOGL"]
         self.initial_prices = {"AAPL": 150.0, "MSFT": 300.0, "GOOGL": 2500.0}
         self.running = False
+        self.batch_size = 256  # Max updates drained from the queue per loop turn
+        self.queue_size = 10000
         
         # Initialize components
+        self.handler = FeedHandler(set(self.symbols))
         self.simulator = MarketDataSimulator(
             symbols=self.symbols,
             initial_prices=self.initial_prices,
             volatility=0.001,
-            update_interval=0.1
+            update_interval=0.1,
+            symbol_ids=self.handler.symbol_ids
         )
-        self.handler = FeedHandler(set(self.symbols))
         
         # Initialize analytics engine with the book manager
-        self.analytics = AnalyticsEngine(
-            book_manager=self.handler.book_manager,
-            window_size=100,  # Keep last 100 updates for calculations
-            metrics_interval=1.0  # Calculate metrics every second
-        )
+        self.analytics: Optional[AnalyticsEngine] = None
+        if enable_analytics:
+            self.analytics = AnalyticsEngine(
+                book_manager=self.handler.book_manager,
+                window_size=100,  # Keep last 100 updates for calculations
+                metrics_interval=1.0  # Calculate metrics every second
+            )
         self.update_count = 0
 
     async def print_analytics(self, symbol: str) -> None:
         """Print analytics information for a symbol."""
+        if self.analytics is None:
+            return
         metrics = self.analytics.get_latest_metrics(symbol)
         summary = self.analytics.get_analytics_summary(symbol)
         
         if metrics and summary:
             print(f"\n=== Analytics for {symbol} ===")
-            print(f"Time: {datetime.fromtimestamp(metrics.timestamp/1e9)}")
+            print(f"Time: {format_timestamp(metrics.timestamp)}")
             print(f"Mid Price: {metrics.mid_price:.2f}")
             print(f"Spread (bps): {metrics.spread_bps:.2f}")
             print(f"Volume Weighted Price: {metrics.volume_weighted_price:.2f}")
@@ -55,11 +75,11 @@ class MarketDataApp:
     async def print_book_snapshot(self, symbol: str) -> None:
         """Print formatted order book snapshot."""
         snapshot = self.handler.get_book_snapshot(symbol)
-        if not snapshot:
-            return
+        if not snapshot or snapshot.sequence_number == 0:
+            return  # No updates applied to this book yet
 
         print(f"\n=== Order Book Snapshot for {symbol} ===")
-        print(f"Time: {datetime.fromtimestamp(snapshot.timestamp/1e9)}")
+        print(f"Time: {format_timestamp(snapshot.timestamp)}")
         print(f"Sequence: {snapshot.sequence_number}")
         
         print("\nBids:")
@@ -83,49 +103,107 @@ class MarketDataApp:
                 await self.print_analytics(symbol)
             await asyncio.sleep(5)  # Update every 5 seconds
 
+    async def produce_updates(self, queue: asyncio.Queue) -> None:
+        """Push simulator updates onto the processing queue."""
+        cancelled = False
+        try:
+            async for update in self.simulator.start():
+                await queue.put(update)
+        except asyncio.CancelledError:
+            cancelled = True  # Shutdown, the consumer has already stopped
+            raise
+        finally:
+            if not cancelled:
+                # Always tell the consumer the feed has ended, including when it failed
+                await queue.put(None)
+
+    async def consume_updates(self, queue: asyncio.Queue) -> None:
+        """Drain queued updates in batches and run them through the pipeline."""
+        while True:
+            update = await queue.get()
+            batch = [update]
+            for _ in range(min(self.batch_size - 1, queue.qsize())):
+                batch.append(queue.get_nowait())
+
+            # One handler per batch rather than per update; after a failure the
+            # offending update is logged and dropped and the rest still run
+            health_check_due = False
+            start = 0
+            while start < len(batch):
+                index = start
+                try:
+                    for index in range(start, len(batch)):
+                        update = batch[index]
+                        if update is None:
+                            return
+                        self.update_count += 1
+                        if self.update_count % 100 == 0:
+                            health_check_due = True  # Periodic health check, run after the batch
+                        
+                        # Process update through feed handler
+                        processed_update = self.handler.process_update(update)
+                        
+                        # Process update through analytics engine
+                        if processed_update:
+                            if self.analytics is not None:
+                                self.analytics.process_update(processed_update)
+                            if logger.isEnabledFor(logging.DEBUG):
+                                logger.debug("Processed update %d: %r", self.update_count, processed_update)
+                    break
+                except Exception:
+                    logger.exception("Failed to process update %d of batch: %r", index, batch[index])
+                    start = index + 1
+
+            # Outside the per-update handler so a failed check is not blamed on an update
+            if health_check_due:
+                try:
+                    await self.handler.check_all_books()
+                except Exception:
+                    logger.exception("Order book health check failed")
+
     async def run(self) -> None:
         """Run the market data application."""
         self.running = True
+        queue: asyncio.Queue = asyncio.Queue(maxsize=self.queue_size)
         
-        # Start the analytics engine
-        analytics_task = asyncio.create_task(self.analytics.start())
+        # Start the monitoring task and the feed producer
+        producer = asyncio.create_task(self.produce_updates(queue))
+        tasks = [asyncio.create_task(self.monitor_markets()), producer]
         
-        # Start the monitoring task
-        monitor_task = asyncio.create_task(self.monitor_markets())
+        # Start the analytics engine
+        if self.analytics is not None:
+            tasks.append(asyncio.create_task(self.analytics.start()))
         
         try:
-            async for update in self.simulator.start():
-                self.update_count += 1
-                
-                # Process update through feed handler
-                processed_update = await self.handler.process_update(update)
-                
-                # Process update through analytics engine
-                if processed_update:
-                    self.analytics.process_update(processed_update)
-                    logger.debug(f"Processed update {self.update_count}: {processed_update}")
-                
-                # Periodic health check
-                if self.update_count % 100 == 0:
-                    await self.handler.check_all_books()
-                    
+            await self.consume_updates(queue)
+            # The feed has ended; re-raise the producer's exception if it failed
+            await producer
         except KeyboardInterrupt:
             logger.info("Shutting down market data application...")
         finally:
             self.running = False
             self.simulator.stop()
-            self.analytics.stop()
+            if self.analytics is not None:
+                self.analytics.stop()
             
             # Cancel and await all tasks
-            analytics_task.cancel()
-            monitor_task.cancel()
+            for task in tasks:
+                task.cancel()
             try:
-                await asyncio.gather(analytics_task, monitor_task, return_exceptions=True)
+                await asyncio.gather(*tasks, return_exceptions=True)
             except asyncio.CancelledError:
                 pass
 
 def main():
-    app = MarketDataApp()
+    parser = argparse.ArgumentParser(description="Run the simulated market data pipeline.")
+    parser.add_argument(
+        "--no-analytics",
+        action="store_true",
+        help="run the feed and order books without the analytics engine"
+    )
+    args = parser.parse_args()
+
+    app = MarketDataApp(enable_analytics=not args.no_analytics)
     asyncio.run(app.run())
 
 if __name__ == "__main__":
@@ -5,6 +5,7 @@ setup(
     version="0.1.0",
     packages=find_packages(),
     package_dir={"": "src"},
+    python_requires=">=3.10",
     install_requires=[
         "numpy",
         "pandas",
@@ -15,4 +16,7 @@ setup(
         "aiohttp",
         "pyarrow"
     ],
+    extras_require={
+        "jit": ["numba"],
+    },
 )
\ No newline at end of file
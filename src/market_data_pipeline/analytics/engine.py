@@ -1,9 +1,9 @@
-from decimal import Decimal
-from typing import Dict, Optional, List
+from collections import defaultdict, deque
+from typing import Deque, Dict, Optional
 import asyncio
 from ..order_book.manager import OrderBookManager
 from ..data_ingestion.models import MarketUpdate
-from .metrics import MarketAnalytics, MarketMetrics
+from .metrics import MarketAnalytics, MarketMetrics, MetricsPool
 from ..utils.logging import get_logger
 
 logger = get_logger(__name__)
@@ -13,12 +13,17 @@ class AnalyticsEngine:
         self,
         book_manager: OrderBookManager,
         window_size: int = 100,
-        metrics_interval: float = 1.0
+        metrics_interval: float = 1.0,
+        history_size: int = 1000
     ):
         self.book_manager = book_manager
         self.analytics = MarketAnalytics(window_size)
         self.metrics_interval = metrics_interval
-        self.metrics_history: Dict[str, List[MarketMetrics]] = {}
+        self.history_size = history_size
+        self.metrics_history: Dict[str, Deque[MarketMetrics]] = defaultdict(
+            lambda: deque(maxlen=self.history_size)
+        )
+        self._metrics_pool = MetricsPool()
         self.running = False
         logger.info("Initialized analytics engine")
 
@@ -52,37 +57,48 @@ class AnalyticsEngine:
     async def _calculate_metrics(self) -> None:
         """Calculate metrics for all active symbols."""
         try:
-            for symbol, book in self.book_manager.books.items():
-                snapshot = book.get_snapshot()
-                metrics = self.analytics.calculate_book_metrics(snapshot)
+            books = self.book_manager.books
+            symbols = list(books)
+            snapshots = [book.get_snapshot() for book in books.values()]
+            for symbol in symbols:
+                self.analytics.refresh_statistics(symbol)
+            pooled = [self._metrics_pool.acquire() for _ in snapshots]
+            results = self.analytics.calculate_batch_metrics(snapshots, pooled)
+
+            for symbol, instance, metrics in zip(symbols, pooled, results):
+                if metrics is None:
+                    # Nothing was recorded, so the instance can go straight back
+                    self._metrics_pool.release(instance)
+                    continue
+
+                # Store metrics history, recycling the entry the deque evicts
+                history = self.metrics_history[symbol]
+                evicted = history[0] if len(history) == history.maxlen else None
+                history.append(metrics)
+                if evicted is not None:
+                    self._metrics_pool.release(evicted)
                 
-                if metrics:
-                    # Store metrics history
-                    if symbol not in self.metrics_history:
-                        self.metrics_history[symbol] = []
-                    self.metrics_history[symbol].append(metrics)
-                    
-                    # Generate and log signals
-                    signals = self.analytics.generate_signals(metrics)
-                    if any(signals.values()):
-                        logger.info(f"Signals generated for {symbol}: {signals}")
-                        
-                    # Trim history if needed
-                    if len(self.metrics_history[symbol]) > 1000:  # Keep last 1000 metrics
-                        self.metrics_history[symbol].pop(0)
+                # Generate and log signals
+                signals = self.analytics.generate_signals(metrics)
+                if any(signals.values()):
+                    logger.info(f"Signals generated for {symbol}: {signals}")
 
         except Exception as e:
             logger.error(f"Error calculating metrics: {e}")
 
     def get_latest_metrics(self, symbol: str) -> Optional[MarketMetrics]:
-        """Get the most recent metrics for a symbol."""
+        """Get the most recent metrics for a symbol.
+
+        The instance is recycled once it ages out of the history, so callers
+        should copy any values they need to keep around.
+        """
         try:
-            history = self.metrics_history.get(symbol, [])
+            history = self.metrics_history.get(symbol)
             return history[-1] if history else None
         except Exception as e:
             logger.error(f"Error getting latest metrics: {e}")
             return None
 
-    def get_analytics_summary(self, symbol: str) -> Dict[str, Decimal]:
+    def get_analytics_summary(self, symbol: str) -> Dict[str, float]:
         """Get analytics summary for a symbol."""
         return self.analytics.get_analytics_summary(symbol)
\ No newline at end of file
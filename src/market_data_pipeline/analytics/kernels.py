@@ -0,0 +1,71 @@
+import math
+from typing import Tuple
+import numpy as np
+from ..utils.jit import NUMBA_AVAILABLE, njit
+
+@njit(cache=True, fastmath=True)
+def push_log_price(
+    ring: np.ndarray,
+    head: int,
+    count: int,
+    sum_r: float,
+    sum_r2: float,
+    log_price: float
+) -> Tuple[int, int, float, float]:
+    """Write a log price into the ring and update the running log return sums."""
+    window = ring.shape[0]
+    if count > 0:
+        r = log_price - ring[(head - 1) % window]
+        sum_r += r
+        sum_r2 += r * r
+    if count == window:
+        # The return between the two oldest prices leaves the window
+        evicted = ring[(head + 1) % window] - ring[head]
+        sum_r -= evicted
+        sum_r2 -= evicted * evicted
+    else:
+        count += 1
+    ring[head] = log_price
+    head = (head + 1) % window
+    return head, count, sum_r, sum_r2
+
+# Fast math without the no-NaN/no-inf assumptions, so NaN checks survive compilation
+@njit(cache=True, fastmath={'nsz', 'arcp', 'contract', 'afn', 'reassoc'})
+def rolling_logret_std(count: int, sum_r: float, sum_r2: float) -> float:
+    """Population standard deviation of the log returns of `count` prices.
+
+    Only rounding error below zero is clamped; a NaN variance is returned
+    as NaN rather than reported as zero volatility.
+    """
+    n = count - 1
+    if n < 1:
+        return 0.0
+    mean = sum_r / n
+    variance = sum_r2 / n - mean * mean
+    if variance < 0.0:
+        return 0.0
+    return math.sqrt(variance)
+
+if NUMBA_AVAILABLE:
+    @njit(cache=True, fastmath=True)
+    def side_totals(levels: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+        """Total size and price * size of each book side, fused into one pass."""
+        books, depth = levels.shape[0], levels.shape[1]
+        volumes = np.zeros(books)
+        notionals = np.zeros(books)
+        for i in range(books):
+            volume = 0.0
+            notional = 0.0
+            for j in range(depth):
+                size = levels[i, j, 1]
+                volume += size
+                notional += levels[i, j, 0] * size
+            volumes[i] = volume
+            notionals[i] = notional
+        return volumes, notionals
+else:
+    def side_totals(levels: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+        """Total size and price * size of each book side."""
+        # Interpreted loops would be slower than two NumPy reductions
+        sizes = levels[:, :, 1]
+        return sizes.sum(axis=1), np.einsum('ij,ij->i', levels[:, :, 0], sizes)
@@ -1,131 +1,274 @@
-from decimal import Decimal
-from typing import List, Optional, Dict, Tuple
+from collections import deque
+from typing import Deque, List, Optional, Dict, Tuple
 from dataclasses import dataclass
 from datetime import datetime
+import math
 import numpy as np
 from ..order_book.models import OrderBookSnapshot, PriceLevel
 from ..data_ingestion.models import MarketUpdate, Side
 from ..utils.logging import get_logger
+from .kernels import push_log_price, rolling_logret_std, side_totals
 
 logger = get_logger(__name__)
 
-@dataclass
+@dataclass(slots=True)
 class MarketMetrics:
-    symbol: str
-    timestamp: int
-    spread: Decimal
-    spread_bps: Decimal
-    mid_price: Decimal
-    volume_weighted_price: Decimal
-    rolling_volume: Decimal
-    volatility: Decimal
-    order_imbalance: Decimal
+    symbol: str = ""
+    timestamp: int = 0
+    spread: float = 0.0
+    spread_bps: float = 0.0
+    mid_price: float = 0.0
+    volume_weighted_price: float = 0.0
+    rolling_volume: float = 0.0
+    volatility: float = 0.0
+    order_imbalance: float = 0.0
+
+class MetricsPool:
+    """Free list of reusable MarketMetrics instances."""
+
+    def __init__(self, capacity: int = 256):
+        self.capacity = capacity
+        self._free: List[MarketMetrics] = [MarketMetrics() for _ in range(capacity)]
+
+    def acquire(self) -> MarketMetrics:
+        """Take an instance from the pool, allocating a new one if it is empty."""
+        return self._free.pop() if self._free else MarketMetrics()
+
+    def release(self, metrics: MarketMetrics) -> None:
+        """Return an instance to the pool once nothing references it anymore."""
+        if len(self._free) < self.capacity:
+            self._free.append(metrics)
+
+class _ReturnWindow:
+    """Ring buffer of log prices with running sums of the log returns it spans."""
+    __slots__ = ('ring', 'head', 'count', 'sum_r', 'sum_r2')
+
+    def __init__(self, window_size: int):
+        self.ring = np.empty(window_size, dtype=np.float64)
+        self.head = 0
+        self.count = 0
+        self.sum_r = 0.0
+        self.sum_r2 = 0.0
+
+    def push(self, price: float) -> None:
+        self.head, self.count, self.sum_r, self.sum_r2 = push_log_price(
+            self.ring, self.head, self.count, self.sum_r, self.sum_r2, math.log(price)
+        )
+
+    def std(self) -> float:
+        return rolling_logret_std(self.count, self.sum_r, self.sum_r2)
 
 class MarketAnalytics:
     def __init__(self, window_size: int = 100):
         self.window_size = window_size
-        self.price_history: Dict[str, List[Decimal]] = {}
-        self.volume_history: Dict[str, List[Decimal]] = {}
-        self.update_history: Dict[str, List[MarketUpdate]] = {}
-        self._moving_averages: Dict[str, Decimal] = {}
-        self._volatilities: Dict[str, Decimal] = {}
+        self.price_history: Dict[str, Deque[float]] = {}
+        self.volume_history: Dict[str, Deque[float]] = {}
+        self.update_history: Dict[str, Deque[MarketUpdate]] = {}
+        self._return_windows: Dict[str, _ReturnWindow] = {}
+        self._price_sums: Dict[str, float] = {}
+        self._volume_sums: Dict[str, float] = {}
+        self._moving_averages: Dict[str, float] = {}
+        self._volatilities: Dict[str, float] = {}
+        self._bid_levels = np.zeros((0, 0, 2), dtype=np.float64)
+        self._ask_levels = np.zeros((0, 0, 2), dtype=np.float64)
         logger.info(f"Initialized market analytics with window size {window_size}")
 
-    def calculate_book_metrics(self, snapshot: OrderBookSnapshot) -> Optional[MarketMetrics]:
-        """Calculate metrics from order book snapshot."""
+    def calculate_book_metrics(
+        self,
+        snapshot: OrderBookSnapshot,
+        out: Optional[MarketMetrics] = None
+    ) -> Optional[MarketMetrics]:
+        """Calculate metrics from order book snapshot, filling `out` in place if given."""
         try:
             if not snapshot.bids or not snapshot.asks:
                 return None
 
+            # One pass per side accumulates both volume and notional; for a
+            # single book this beats building arrays
+            bid_volume = bid_notional = 0.0
+            for level in snapshot.bids:
+                bid_volume += level.size
+                bid_notional += level.price * level.size
+            ask_volume = ask_notional = 0.0
+            for level in snapshot.asks:
+                ask_volume += level.size
+                ask_notional += level.price * level.size
+
             # Basic metrics
-            best_bid = snapshot.bids[0]
-            best_ask = snapshot.asks[0]
-            spread = best_ask.price - best_bid.price
-            mid_price = (best_ask.price + best_bid.price) / Decimal('2')
-            spread_bps = (spread / mid_price) * Decimal('10000')
+            best_bid = snapshot.bids[0].price
+            best_ask = snapshot.asks[0].price
+            spread = best_ask - best_bid
+            mid_price = (best_ask + best_bid) / 2.0
+            spread_bps = (spread / mid_price) * 10000.0
 
             # Volume calculations
-            bid_volume = sum(level.size for level in snapshot.bids)
-            ask_volume = sum(level.size for level in snapshot.asks)
             total_volume = bid_volume + ask_volume
 
             # Volume weighted price
-            vwap_bids = sum(level.price * level.size for level in snapshot.bids)
-            vwap_asks = sum(level.price * level.size for level in snapshot.asks)
-            vwp = (vwap_bids + vwap_asks) / total_volume if total_volume > 0 else mid_price
+            vwp = (bid_notional + ask_notional) / total_volume if total_volume > 0 else mid_price
 
             # Order imbalance
-            imbalance = (bid_volume - ask_volume) / (bid_volume + ask_volume) if total_volume > 0 else Decimal('0')
-
-            # Get stored volatility or calculate if not available
-            volatility = self._volatilities.get(snapshot.symbol, Decimal('0'))
-
-            return MarketMetrics(
-                symbol=snapshot.symbol,
-                timestamp=snapshot.timestamp,
-                spread=spread,
-                spread_bps=spread_bps,
-                mid_price=mid_price,
-                volume_weighted_price=vwp,
-                rolling_volume=total_volume,
-                volatility=volatility,
-                order_imbalance=imbalance
-            )
+            imbalance = (bid_volume - ask_volume) / total_volume if total_volume > 0 else 0.0
+
+            metrics = out if out is not None else MarketMetrics()
+            metrics.symbol = snapshot.symbol
+            metrics.timestamp = snapshot.timestamp
+            metrics.spread = spread
+            metrics.spread_bps = spread_bps
+            metrics.mid_price = mid_price
+            metrics.volume_weighted_price = vwp
+            metrics.rolling_volume = total_volume
+            metrics.volatility = self._volatilities.get(snapshot.symbol, 0.0)
+            metrics.order_imbalance = imbalance
+            return metrics
 
         except Exception as e:
             logger.error(f"Error calculating book metrics: {e}")
             return None
 
-    def update_time_series(self, update: MarketUpdate) -> None:
-        """Update time series data with new market update."""
+    def calculate_batch_metrics(
+        self,
+        snapshots: List[OrderBookSnapshot],
+        out: Optional[List[MarketMetrics]] = None
+    ) -> List[Optional[MarketMetrics]]:
+        """Calculate metrics for several snapshots with one set of array reductions.
+
+        Levels of every book are stacked into (books, depth) price and size
+        arrays, zero padded, so each metric is a single vector operation.
+        Entries are None for books missing a bid or an ask side.
+        """
         try:
-            symbol = update.symbol
-            
-            # Initialize histories if needed
-            if symbol not in self.price_history:
-                self.price_history[symbol] = []
-                self.volume_history[symbol] = []
-                self.update_history[symbol] = []
-
-            # Update histories
-            self.price_history[symbol].append(Decimal(str(update.price)))
-            self.volume_history[symbol].append(Decimal(str(update.size)))
-            self.update_history[symbol].append(update)
-
-            # Maintain window size
-            if len(self.price_history[symbol]) > self.window_size:
-                self.price_history[symbol].pop(0)
-                self.volume_history[symbol].pop(0)
-                self.update_history[symbol].pop(0)
-
-            # Update derived metrics
-            self._update_moving_averages(symbol)
-            self._update_volatility(symbol)
+            count = len(snapshots)
+            depth = max((max(len(s.bids), len(s.asks)) for s in snapshots), default=0)
+            bids, asks = self._book_arrays(count, depth)
+            has_both_sides = np.zeros(count, dtype=bool)
+
+            for i, snapshot in enumerate(snapshots):
+                if snapshot.bids and snapshot.asks:
+                    has_both_sides[i] = True
+                    bids[i, :len(snapshot.bids)] = [(level.price, level.size) for level in snapshot.bids]
+                    asks[i, :len(snapshot.asks)] = [(level.price, level.size) for level in snapshot.asks]
+
+            if depth == 0 or not has_both_sides.any():
+                return [None] * count  # No two-sided book, nothing to index
+
+            # Volume and notional per side in one pass over the levels
+            bid_volume, bid_notional = side_totals(bids)
+            ask_volume, ask_notional = side_totals(asks)
+
+            with np.errstate(divide='ignore', invalid='ignore'):
+                # Basic metrics
+                best_bid = bids[:, 0, 0]
+                best_ask = asks[:, 0, 0]
+                spread = best_ask - best_bid
+                mid_price = (best_ask + best_bid) / 2.0
+                spread_bps = (spread / mid_price) * 10000.0
+
+                # Volume calculations
+                total_volume = bid_volume + ask_volume
+
+                # Volume weighted price
+                vwap_num = bid_notional + ask_notional
+                has_volume = total_volume > 0
+                vwp = np.where(has_volume, vwap_num / total_volume, mid_price)
+
+                # Order imbalance
+                imbalance = np.where(has_volume, (bid_volume - ask_volume) / total_volume, 0.0)
+
+            results: List[Optional[MarketMetrics]] = [None] * count
+            for i in np.flatnonzero(has_both_sides).tolist():
+                snapshot = snapshots[i]
+                metrics = out[i] if out is not None else MarketMetrics()
+                metrics.symbol = snapshot.symbol
+                metrics.timestamp = snapshot.timestamp
+                metrics.spread = float(spread[i])
+                metrics.spread_bps = float(spread_bps[i])
+                metrics.mid_price = float(mid_price[i])
+                metrics.volume_weighted_price = float(vwp[i])
+                metrics.rolling_volume = float(total_volume[i])
+                metrics.volatility = self._volatilities.get(snapshot.symbol, 0.0)
+                metrics.order_imbalance = float(imbalance[i])
+                results[i] = metrics
+            return results
 
         except Exception as e:
-            logger.error(f"Error updating time series: {e}")
+            logger.error(f"Error calculating book metrics: {e}")
+            return [None] * len(snapshots)
+
+    def _book_arrays(self, count: int, depth: int) -> Tuple[np.ndarray, np.ndarray]:
+        """Return zeroed (count, depth, 2) bid and ask buffers, reusing past allocations."""
+        rows, cols = self._bid_levels.shape[:2]
+        if count > rows or depth > cols:
+            shape = (max(count, rows), max(depth, cols), 2)
+            self._bid_levels = np.zeros(shape, dtype=np.float64)
+            self._ask_levels = np.zeros(shape, dtype=np.float64)
+        bids = self._bid_levels[:count, :depth]
+        asks = self._ask_levels[:count, :depth]
+        bids.fill(0.0)
+        asks.fill(0.0)
+        return bids, asks
+
+    def update_time_series(self, update: MarketUpdate) -> None:
+        """Update time series data with new market update.
+
+        Runs once per tick, so errors are validated up front and otherwise
+        left to the caller rather than caught here.
+        """
+        symbol = update.symbol
+        # A single inf or NaN would poison the running sums
+        if not update.has_valid_price_and_size():
+            raise ValueError(f"Invalid price or size for {symbol}: {update.price}, {update.size}")
+        if not update.uses_price:
+            return  # Order-id modify or delete; there is no price to record
+        
+        # Initialize histories if needed
+        if symbol not in self.price_history:
+            # Bounded deques evict the oldest entry in O(1) on append
+            self.price_history[symbol] = deque(maxlen=self.window_size)
+            self.volume_history[symbol] = deque(maxlen=self.window_size)
+            self.update_history[symbol] = deque(maxlen=self.window_size)
+            self._return_windows[symbol] = _ReturnWindow(self.window_size)
+            self._price_sums[symbol] = 0.0
+            self._volume_sums[symbol] = 0.0
+
+        prices = self.price_history[symbol]
+        volumes = self.volume_history[symbol]
+
+        # Take the entries about to be evicted out of the running sums
+        if len(prices) == self.window_size:
+            self._price_sums[symbol] -= prices[0]
+            self._volume_sums[symbol] -= volumes[0]
+
+        # Update histories
+        prices.append(update.price)
+        volumes.append(update.size)
+        self._price_sums[symbol] += update.price
+        self._volume_sums[symbol] += update.size
+        self.update_history[symbol].append(update)
+        self._return_windows[symbol].push(update.price)
+
+    def refresh_statistics(self, symbol: str) -> None:
+        """Derive moving average and volatility from the running window state.
+
+        Updates only maintain the window; derivation is deferred to readers
+        such as the periodic metrics task.
+        """
+        if symbol in self.price_history:
+            self._update_moving_averages(symbol)
+            self._update_volatility(symbol)
 
     def _update_moving_averages(self, symbol: str) -> None:
         """Update moving averages for symbol."""
-        try:
-            prices = self.price_history[symbol]
-            if len(prices) > 0:
-                self._moving_averages[symbol] = sum(prices) / Decimal(str(len(prices)))
-        except Exception as e:
-            logger.error(f"Error updating moving averages: {e}")
+        prices = self.price_history[symbol]
+        if len(prices) > 0:
+            self._moving_averages[symbol] = self._price_sums[symbol] / len(prices)
 
     def _update_volatility(self, symbol: str) -> None:
         """Update volatility calculation for symbol."""
-        try:
-            prices = self.price_history[symbol]
-            if len(prices) > 1:
-                # Convert to numpy array for efficient calculation
-                price_array = np.array([float(p) for p in prices])
-                returns = np.diff(np.log(price_array))
-                volatility = np.std(returns) * np.sqrt(252)  # Annualized
-                self._volatilities[symbol] = Decimal(str(volatility))
-        except Exception as e:
-            logger.error(f"Error updating volatility: {e}")
+        window = self._return_windows[symbol]
+        if window.count > 1:
+            # Running sums make this O(1) regardless of window size
+            self._volatilities[symbol] = window.std() * math.sqrt(252)  # Annualized
 
     def generate_signals(self, metrics: MarketMetrics) -> Dict[str, bool]:
         """Generate trading signals based on current metrics."""
@@ -133,13 +276,13 @@ class MarketAnalytics:
         
         try:
             # Volume imbalance signal
-            signals['volume_imbalance'] = abs(metrics.order_imbalance) > Decimal('0.7')
+            signals['volume_imbalance'] = abs(metrics.order_imbalance) > 0.7
 
             # Spread anomaly signal
-            signals['wide_spread'] = metrics.spread_bps > Decimal('50')  # 50 bps threshold
+            signals['wide_spread'] = metrics.spread_bps > 50.0  # 50 bps threshold
 
             # Volatility breakout signal
-            volatility_threshold = Decimal('0.02')  # 2% threshold
+            volatility_threshold = 0.02  # 2% threshold
             signals['high_volatility'] = metrics.volatility > volatility_threshold
 
             # Price movement signal based on moving average
@@ -152,14 +295,15 @@ class MarketAnalytics:
 
         return signals
 
-    def get_analytics_summary(self, symbol: str) -> Dict[str, Decimal]:
+    def get_analytics_summary(self, symbol: str) -> Dict[str, float]:
         """Get summary of current analytics for a symbol."""
         try:
+            self.refresh_statistics(symbol)
             return {
-                'moving_average': self._moving_averages.get(symbol, Decimal('0')),
-                'volatility': self._volatilities.get(symbol, Decimal('0')),
-                'volume_ma': sum(self.volume_history.get(symbol, [])) / Decimal(str(self.window_size)) \
-                    if symbol in self.volume_history and self.volume_history[symbol] else Decimal('0')
+                'moving_average': self._moving_averages.get(symbol, 0.0),
+                'volatility': self._volatilities.get(symbol, 0.0),
+                'volume_ma': self._volume_sums[symbol] / self.window_size \
+                    if symbol in self.volume_history and self.volume_history[symbol] else 0.0
             }
         except Exception as e:
             logger.error(f"Error getting analytics summary: {e}")
@@ -1,4 +1,5 @@
 from collections import deque
+from itertools import islice
 from typing import Optional, Deque
 import logging
 from .models import MarketUpdate
@@ -14,18 +15,21 @@ class CircularBuffer:
 
     def add(self, update: MarketUpdate) -> None:
         """Add a market update to the buffer."""
-        try:
-            self.buffer.append(update)
-            if len(self.buffer) == self.max_size:
-                logger.debug("Buffer reached maximum size, oldest update removed")
-        except Exception as e:
-            logger.error(f"Error adding update to buffer: {e}")
-            raise
+        self.buffer.append(update)
+        if len(self.buffer) == self.max_size:
+            logger.debug("Buffer reached maximum size, oldest update removed")
 
     def get_latest(self, n: int = 1) -> list[MarketUpdate]:
         """Get the n most recent updates."""
         try:
-            return list(self.buffer)[-n:]
+            if n <= 0:
+                return []
+            if n == 1:
+                return [self.buffer[-1]] if self.buffer else []
+            # Walk back from the newest entry so only n items are touched
+            latest = list(islice(reversed(self.buffer), n))
+            latest.reverse()
+            return latest
         except Exception as e:
             logger.error(f"Error retrieving updates from buffer: {e}")
             raise
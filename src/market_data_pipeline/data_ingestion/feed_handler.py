@@ -1,14 +1,26 @@
 import asyncio
 import logging
-from typing import Dict, Optional, Set, Tuple
+import sys
+from dataclasses import dataclass
+from typing import Dict, List, Optional, Set, Tuple
 from .models import MarketUpdate
 from .buffer import CircularBuffer
+from ..order_book.book import OrderBook
 from ..order_book.manager import OrderBookManager
 from ..order_book.models import OrderBookSnapshot, PriceLevel
 from ..utils.logging import get_logger
 
 logger = get_logger(__name__)
 
+@dataclass(slots=True)
+class SymbolState:
+    """Per-symbol bookkeeping touched on every update."""
+    symbol: str
+    book: OrderBook
+    last_seq: int = 0
+    update_count: int = 0
+    logged_update_count: int = 0
+
 class FeedHandler:
     def __init__(
         self,
@@ -16,94 +28,109 @@ class FeedHandler:
         buffer_size: int = 10000,
         sequence_gap_threshold: int = 10
     ):
-        self.symbols = symbols
+        self.symbols = {sys.intern(symbol) for symbol in symbols}
         self.buffer = CircularBuffer(buffer_size)
         self.sequence_gap_threshold = sequence_gap_threshold
-        self.last_sequence_numbers: Dict[str, int] = {}
         self.book_manager = OrderBookManager()
-        self.book_update_counts: Dict[str, int] = {symbol: 0 for symbol in symbols}
+        # Integer ids let producers tag updates so routing is a list index
+        self.symbol_ids: Dict[str, int] = {
+            symbol: symbol_id for symbol_id, symbol in enumerate(sorted(self.symbols))
+        }
+        self.state_by_id: List[SymbolState] = [
+            SymbolState(symbol=symbol, book=self.book_manager.get_or_create_book(symbol))
+            for symbol in self.symbol_ids
+        ]
+        self.state: Dict[str, SymbolState] = {state.symbol: state for state in self.state_by_id}
         logger.info(f"Initialized feed handler for symbols: {symbols}")
 
-    async def process_update(self, update: MarketUpdate) -> Optional[MarketUpdate]:
-        """Process a market update, handling sequence gaps and validation."""
-        try:
-            if update.symbol not in self.symbols:
-                logger.warning(f"Received update for unknown symbol: {update.symbol}")
-                return None
-
-            # Check sequence number
-            last_seq = self.last_sequence_numbers.get(update.symbol, 0)
-            seq_gap = update.sequence_number - last_seq - 1
-
-            if seq_gap > 0:
-                if seq_gap > self.sequence_gap_threshold:
-                    logger.error(
-                        f"Large sequence gap detected for {update.symbol}: "
-                        f"expected {last_seq + 1}, got {update.sequence_number}"
-                    )
-                    await self._handle_large_sequence_gap(update.symbol, last_seq + 1, update.sequence_number - 1)
-                else:
-                    logger.warning(
-                        f"Small sequence gap detected for {update.symbol}: "
-                        f"missed {seq_gap} updates"
-                    )
-
-            # Update last sequence number
-            self.last_sequence_numbers[update.symbol] = update.sequence_number
-
-            # Store update in buffer
-            self.buffer.add(update)
-            
-            # Update order book
-            if self.book_manager.process_update(update):
-                self.book_update_counts[update.symbol] += 1
-                await self._check_book_state(update.symbol)
-            
-            return update
+    def process_update(self, update: MarketUpdate) -> Optional[MarketUpdate]:
+        """Process a market update, handling sequence gaps and validation.
+
+        Updates that fail validation are logged and dropped; other errors
+        propagate to the caller.
+        """
+        symbol_id = update.symbol_id
+        if 0 <= symbol_id < len(self.state_by_id) and self.state_by_id[symbol_id].symbol == update.symbol:
+            state = self.state_by_id[symbol_id]
+        else:
+            state = self.state.get(update.symbol)
+        if state is None:
+            if logger.isEnabledFor(logging.WARNING):
+                logger.warning("Received update for unknown symbol: %s", update.symbol)
+            return None
+
+        # Validate here so the order book can apply updates without guarding
+        if not update.has_valid_price_and_size():
+            if logger.isEnabledFor(logging.WARNING):
+                logger.warning("Rejected malformed update for %s: price=%r size=%r",
+                               update.symbol, update.price, update.size)
+            return None
+
+        # Check sequence number
+        last_seq = state.last_seq
+        seq_gap = update.sequence_number - last_seq - 1
+
+        if seq_gap > 0:
+            if seq_gap > self.sequence_gap_threshold:
+                logger.error(
+                    "Large sequence gap detected for %s: expected %d, got %d",
+                    update.symbol, last_seq + 1, update.sequence_number
+                )
+                self._handle_large_sequence_gap(update.symbol, last_seq + 1, update.sequence_number - 1)
+            elif logger.isEnabledFor(logging.WARNING):
+                logger.warning(
+                    "Small sequence gap detected for %s: missed %d updates",
+                    update.symbol, seq_gap
+                )
 
-        except Exception as e:
-            logger.error(f"Error processing market update: {e}")
-            raise
+        # Update last sequence number
+        state.last_seq = update.sequence_number
 
-    async def _handle_large_sequence_gap(self, symbol: str, start_seq: int, end_seq: int) -> None:
+        # Store update in buffer
+        self.buffer.add(update)
+        
+        # Update order book
+        if state.book.process_update(update):
+            state.update_count += 1
+            self._check_book_state(update.symbol, state.book)
+        
+        return update
+
+    def _handle_large_sequence_gap(self, symbol: str, start_seq: int, end_seq: int) -> None:
         """Handle large sequence gaps by requesting missing updates or resetting the book."""
         try:
             # In a production system, you might want to request missing updates from the exchange
             # For now, we'll reset the book for the affected symbol
-            logger.warning(f"Resetting order book for {symbol} due to large sequence gap")
-            book = self.book_manager.get_book(symbol)
-            if book:
-                book.clear()
+            logger.warning("Resetting order book for %s due to large sequence gap", symbol)
+            self.state[symbol].book.clear()
         except Exception as e:
             logger.error(f"Error handling sequence gap for {symbol}: {e}")
 
-    async def _check_book_state(self, symbol: str) -> None:
-        """Monitor order book state and log any anomalies."""
-        try:
-            book = self.book_manager.get_book(symbol)
-            if not book:
-                return
-
-            best_bid, best_ask = book.get_top_of_book()
-            
-            # Check for crossed book
-            if best_bid is not None and best_ask is not None:
-                if best_bid.price >= best_ask.price:
-                    logger.error(f"Crossed book detected for {symbol}: "
-                               f"Bid {best_bid.price} >= Ask {best_ask.price}")
-
-            # Log periodic book state
-            if self.book_update_counts[symbol] % 1000 == 0:
-                snapshot = book.get_snapshot()
-                logger.info(
-                    f"Order book state for {symbol} after {self.book_update_counts[symbol]} updates:\n"
-                    f"Top Bid: {best_bid.price if best_bid else 'None'}@{best_bid.size if best_bid else 'None'}\n"
-                    f"Top Ask: {best_ask.price if best_ask else 'None'}@{best_ask.size if best_ask else 'None'}\n"
-                    f"Bid Levels: {len(snapshot.bids)}, Ask Levels: {len(snapshot.asks)}"
-                )
-
-        except Exception as e:
-            logger.error(f"Error checking book state for {symbol}: {e}")
+    def _check_book_state(self, symbol: str, book: OrderBook) -> None:
+        """Check the order book for anomalies after an update."""
+        best_bid, best_ask = book.get_top_of_book()
+        
+        # Check for crossed book
+        if best_bid is not None and best_ask is not None:
+            if best_bid.price >= best_ask.price:
+                logger.error("Crossed book detected for %s: Bid %s >= Ask %s",
+                             symbol, best_bid.price, best_ask.price)
+
+    def _log_book_state(self, symbol: str, state: SymbolState) -> None:
+        """Log the book state once every 1000 updates applied to it."""
+        update_count = state.update_count
+        if update_count - state.logged_update_count < 1000:
+            return
+        state.logged_update_count = update_count
+
+        best_bid, best_ask = state.book.get_top_of_book()
+        snapshot = state.book.get_snapshot()
+        logger.info(
+            f"Order book state for {symbol} after {update_count} updates:\n"
+            f"Top Bid: {best_bid.price if best_bid else 'None'}@{best_bid.size if best_bid else 'None'}\n"
+            f"Top Ask: {best_ask.price if best_ask else 'None'}@{best_ask.size if best_ask else 'None'}\n"
+            f"Bid Levels: {len(snapshot.bids)}, Ask Levels: {len(snapshot.asks)}"
+        )
 
     def get_buffer_snapshot(self) -> list[MarketUpdate]:
         """Get current buffer contents."""
@@ -121,10 +148,12 @@ class FeedHandler:
 
     async def check_all_books(self) -> None:
         """Periodic health check of all order books."""
-        for symbol in self.symbols:
-            book = self.book_manager.get_book(symbol)
-            if not book:
-                continue
+        for symbol, state in self.state.items():
+            if state.update_count == 0:
+                continue  # Nothing has been applied to this book yet
+
+            book = state.book
+            self._log_book_state(symbol, state)
 
             snapshot = book.get_snapshot()
             if not snapshot.bids and not snapshot.asks:
@@ -1,14 +1,19 @@
 import asyncio
 import logging
-import random
-from datetime import datetime
-from typing import List, AsyncGenerator
+import sys
+import threading
+import time
+from collections import deque
+from typing import Deque, Dict, List, AsyncGenerator, Optional, Tuple
 import numpy as np
 from ..utils.logging import get_logger
-from .models import MarketUpdate, Side, UpdateType
+from .models import UPDATE_DTYPE, MarketUpdate, _SIDES, _UPDATE_TYPES
 
 logger = get_logger(__name__)
 
+# Seconds the producer backs off when the buffer is full
+_BUFFER_WAIT = 0.001
+
 class MarketDataSimulator:
     def __init__(
         self,
@@ -16,59 +21,182 @@ class MarketDataSimulator:
         initial_prices: dict[str, float],
         volatility: float = 0.001,
         update_interval: float = 0.1,
+        symbol_ids: Optional[Dict[str, int]] = None,
+        batch_size: int = 4096,
+        seed: Optional[int] = None,
+        buffer_size: int = 65536,
     ):
-        self.symbols = symbols
-        self.prices = initial_prices.copy()
+        # Interned so every update shares one string object per symbol
+        self.symbols = [sys.intern(symbol) for symbol in symbols]
+        self.symbol_ids = symbol_ids if symbol_ids is not None else {
+            symbol: symbol_id for symbol_id, symbol in enumerate(symbols)
+        }
+        self.prices = {sys.intern(symbol): price for symbol, price in initial_prices.items()}
         self.volatility = volatility
         self.update_interval = update_interval
+        self.batch_size = batch_size
+        self.buffer_size = buffer_size
+        self.rng = np.random.default_rng(seed)  # PCG64
         self.sequence_number = 0
         self.running = False
+        self._symbol_id_list = [self.symbol_ids.get(symbol, -1) for symbol in symbols]
+        self._symbol_id_array = np.array(self._symbol_id_list, dtype=np.int32)
+        self._batch_symbols: List[int] = []
+        self._batch_prices: List[float] = []
+        self._batch_sizes: List[float] = []
+        self._batch_sides: List[int] = []
+        self._batch_types: List[int] = []
+        self._batch_pos = 0
+        # Filled by the producer thread, drained by start(); bounded by backpressure
+        self._buffer: Deque[MarketUpdate] = deque()
+        self._wakeup = threading.Event()
+        # Set through the consumer's event loop when the buffer gains data or the feed ends
+        self._ready = asyncio.Event()
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._producer: Optional[threading.Thread] = None
+        self._error: Optional[BaseException] = None
         logger.info(f"Initialized simulator with {len(symbols)} symbols")
 
-    def _generate_update(self, symbol: str) -> MarketUpdate:
-        """Generate a realistic market update."""
+    def _draw_batch(self, n: int) -> Tuple[np.ndarray, np.ndarray]:
+        """Draw n updates into an UPDATE_DTYPE array, plus each row's index into symbols.
+
+        Timestamps and sequence numbers are left for the caller to fill in.
+        """
+        rows = np.empty(n, dtype=UPDATE_DTYPE)
+        symbol_idx = self.rng.integers(0, len(self.symbols), n)
+
+        # Simulate price movement using geometric Brownian motion, compounding
+        # each symbol's moves in the order its updates appear in the batch
+        growth = 1.0 + self.rng.standard_normal(n) * self.volatility
+        prices = rows['price']
+        for i, symbol in enumerate(self.symbols):
+            mask = symbol_idx == i
+            path = self.prices[symbol] * np.multiply.accumulate(growth[mask])
+            prices[mask] = path
+            if path.size:
+                self.prices[symbol] = float(path[-1])
+
+        rows['size'] = self.rng.lognormal(4, 0.5, n)  # Realistic order sizes
+        rows['side'] = self.rng.integers(0, len(_SIDES), n)
+        rows['type'] = self.rng.integers(0, len(_UPDATE_TYPES), n)
+        rows['sym_id'] = self._symbol_id_array[symbol_idx]
+        return rows, symbol_idx
+
+    def _generate_batch(self) -> None:
+        """Draw the random inputs for the next batch of updates at once."""
+        rows, symbol_idx = self._draw_batch(self.batch_size)
+        self._batch_symbols = symbol_idx.tolist()
+        self._batch_prices = rows['price'].tolist()
+        self._batch_sizes = rows['size'].tolist()
+        self._batch_sides = rows['side'].tolist()
+        self._batch_types = rows['type'].tolist()
+        self._batch_pos = 0
+
+    def next_batch(self, n: Optional[int] = None) -> np.ndarray:
+        """Generate the next n updates (default batch_size) as an UPDATE_DTYPE array.
+
+        No MarketUpdate objects are built, which suits backtests. Sequence
+        numbers continue the update stream and all rows share the batch time.
+        """
+        rows, _ = self._draw_batch(n or self.batch_size)
+        rows['ts'] = time.time_ns()
+        rows['seq'] = np.arange(self.sequence_number + 1, self.sequence_number + len(rows) + 1)
+        self.sequence_number += len(rows)
+        return rows
+
+    def _next_update(self) -> MarketUpdate:
+        """Build the next market update from the pre-drawn batch."""
+        if self._batch_pos >= len(self._batch_prices):
+            self._generate_batch()
+        i = self._batch_pos
+        self._batch_pos += 1
         self.sequence_number += 1
-        
-        # Simulate price movement using geometric Brownian motion
-        price_change = np.random.normal(0, self.volatility) * self.prices[symbol]
-        self.prices[symbol] += price_change
-        
-        # Generate realistic size
-        size = random.lognormvariate(4, 0.5)  # Generates realistic order sizes
-        
+
+        symbol_index = self._batch_symbols[i]
         return MarketUpdate(
-            timestamp=int(datetime.now().timestamp() * 1e9),  # nanoseconds
-            symbol=symbol,
-            price=self.prices[symbol],
-            size=size,
-            side=random.choice(list(Side)),
-            update_type=random.choice(list(UpdateType)),
+            timestamp=time.time_ns(),
+            symbol=self.symbols[symbol_index],
+            price=self._batch_prices[i],
+            size=self._batch_sizes[i],
+            side=_SIDES[self._batch_sides[i]],
+            update_type=_UPDATE_TYPES[self._batch_types[i]],
             sequence_number=self.sequence_number,
-            exchange_id="SIM"
+            exchange_id="SIM",
+            symbol_id=self._symbol_id_list[symbol_index]
         )
 
+    def _produce(self) -> None:
+        """Generate updates into the buffer until stopped, pacing by update_interval."""
+        buffer = self._buffer
+        try:
+            while self.running:
+                if len(buffer) >= self.buffer_size:
+                    self._wakeup.wait(_BUFFER_WAIT)  # Let the consumer catch up
+                    continue
+                buffer.append(self._next_update())
+                if len(buffer) == 1:
+                    self._notify()  # The consumer may be waiting on an empty buffer
+                if self.update_interval > 0:
+                    self._wakeup.wait(self.update_interval)
+        except Exception as e:
+            self._error = e
+            self.running = False
+        finally:
+            self._notify()
+
+    def _notify(self) -> None:
+        """Wake the consumer in start(); safe to call from any thread."""
+        loop = self._loop
+        if loop is not None:
+            loop.call_soon_threadsafe(self._ready.set)
+
     async def start(self) -> AsyncGenerator[MarketUpdate, None]:
-        """Start generating market updates."""
+        """Start generating market updates.
+
+        Updates are produced on a background thread, so an update_interval
+        of 0 generates as fast as the consumer drains rather than once per
+        event loop iteration.
+        """
         self.running = True
+        self._error = None
+        self._buffer.clear()
+        self._wakeup.clear()
+        self._ready = asyncio.Event()
+        self._loop = asyncio.get_running_loop()
+        self._producer = threading.Thread(target=self._produce, name="feed-simulator", daemon=True)
+        self._producer.start()
         logger.info("Starting market data simulation")
         
+        buffer = self._buffer
+        ready = self._ready
         try:
             while self.running:
-                # Randomly select a symbol to update
-                symbol = random.choice(self.symbols)
-                update = self._generate_update(symbol)
-                
-                yield update
-                
-                await asyncio.sleep(self.update_interval)
-        except Exception as e:
-            logger.error(f"Error in market data simulation: {e}")
-            raise
+                # Drain at most one batch before giving the event loop a turn
+                for _ in range(min(len(buffer), self.batch_size)):
+                    if not self.running:
+                        break
+                    yield buffer.popleft()
+
+                if buffer:
+                    await asyncio.sleep(0)
+                else:
+                    # Clear before rechecking so an append in between still wakes us
+                    ready.clear()
+                    if not buffer and self.running:
+                        await ready.wait()
+
+            if self._error is not None:
+                raise self._error
         finally:
             self.running = False
+            self._wakeup.set()
+            self._producer.join()
+            self._loop = None
             logger.info("Market data simulation stopped")
 
     def stop(self):
         """Stop generating market updates."""
         self.running = False
+        self._wakeup.set()
+        self._notify()
         logger.info("Stopping market data simulation")
\ No newline at end of file
@@ -1,19 +1,50 @@
 from dataclasses import dataclass
 from datetime import datetime
-from enum import Enum
-from typing import Optional
+from enum import IntEnum
+from typing import ClassVar, Dict, List, Optional, Sequence
+import math
 import struct
+import sys
+import numpy as np
 
-class Side(str, Enum):
-    BID = "bid"
-    ASK = "ask"
+class Side(IntEnum):
+    BID = 0
+    ASK = 1
 
-class UpdateType(str, Enum):
-    ADD = "add"
-    MODIFY = "modify"
-    DELETE = "delete"
+class UpdateType(IntEnum):
+    ADD = 0
+    MODIFY = 1
+    DELETE = 2
 
-@dataclass
+# Indexed by the integer codes to get members back without an enum lookup
+_SIDES = tuple(Side)
+_UPDATE_TYPES = tuple(UpdateType)
+
+class _DecodedFields(dict):
+    """Memoized decoding of the small set of padded symbol and exchange id fields."""
+
+    max_size = 4096
+
+    def __missing__(self, raw: bytes) -> str:
+        if len(self) >= self.max_size:
+            self.clear()  # Keep an unexpected stream of distinct values bounded
+        text = self[raw] = sys.intern(raw.rstrip(b'\x00').decode())
+        return text
+
+_DECODED: Dict[bytes, str] = _DecodedFields()
+
+# Columnar form of MarketUpdate for batch paths; side and type hold the enum values
+UPDATE_DTYPE = np.dtype([
+    ('ts', 'i8'),
+    ('price', 'f8'),
+    ('size', 'f8'),
+    ('seq', 'i8'),
+    ('sym_id', 'i4'),
+    ('side', 'i1'),
+    ('type', 'i1'),
+])
+
+@dataclass(slots=True)
 class MarketUpdate:
     timestamp: int  # nanoseconds since epoch
     symbol: str
@@ -23,31 +54,95 @@ class MarketUpdate:
     update_type: UpdateType
     sequence_number: int
     exchange_id: str
+    symbol_id: int = -1  # Index assigned by the feed handler, -1 if unknown
+    order_id: int = -1  # Exchange order id on order-level feeds, -1 for price-level updates
+
+    # Little-endian fixed-width record: timestamp, price, size, sequence number,
+    # symbol, exchange id, side code, update type code, padding, order id (72 bytes)
+    _PACKER: ClassVar[struct.Struct] = struct.Struct("<QddQ12s12sBB6xq")
+    BINARY_SIZE: ClassVar[int] = _PACKER.size
+
+    @property
+    def uses_price(self) -> bool:
+        """Whether a book reads the price; order-id modifies and deletes find the order by id."""
+        return self.order_id < 0 or self.update_type == UpdateType.ADD
+
+    def has_valid_price_and_size(self) -> bool:
+        """Finite non-negative size, and a finite positive price wherever the price is used."""
+        return 0.0 <= self.size < math.inf and (0.0 < self.price < math.inf or not self.uses_price)
 
     def to_binary(self) -> bytes:
         """Convert market update to binary format."""
-        return struct.pack(
-            "!QddfII12s12s",
+        return self._PACKER.pack(*self._binary_fields())
+
+    def _binary_fields(self) -> tuple:
+        """Field values in binary record order."""
+        return (
             self.timestamp,
             self.price,
             self.size,
-            self.side.encode(),
-            self.update_type.encode(),
             self.sequence_number,
-            self.exchange_id.encode()
+            self.symbol.encode(),
+            self.exchange_id.encode(),
+            self.side,
+            self.update_type,
+            self.order_id
         )
 
     @classmethod
-    def from_binary(cls, data: bytes) -> 'MarketUpdate':
+    def to_binary_batch(cls, updates: List['MarketUpdate']) -> bytes:
+        """Pack a list of market updates into one contiguous buffer."""
+        size = cls._PACKER.size
+        buffer = bytearray(size * len(updates))
+        pack_into = cls._PACKER.pack_into
+        for offset, update in zip(range(0, len(buffer), size), updates):
+            pack_into(buffer, offset, *update._binary_fields())
+        return bytes(buffer)
+
+    @classmethod
+    def from_row(
+        cls,
+        rows: np.ndarray,
+        i: int,
+        symbols: Sequence[str],
+        exchange_id: str = ""
+    ) -> 'MarketUpdate':
+        """Create market update from row i of an UPDATE_DTYPE array.
+
+        symbols is indexed by the row's sym_id. The columns are signed, so
+        codes are range checked; a negative one would index from the end.
+        """
+        timestamp, price, size, sequence_number, symbol_id, side, update_type = rows[i].tolist()
+        if not (0 <= side < len(_SIDES) and 0 <= update_type < len(_UPDATE_TYPES)):
+            raise ValueError(f"Invalid side {side} or update type {update_type} in row {i}")
+        if symbol_id < 0:
+            raise ValueError(f"Invalid sym_id {symbol_id} in row {i}")
+        return cls(
+            timestamp=timestamp,
+            symbol=symbols[symbol_id],
+            price=price,
+            size=size,
+            side=_SIDES[side],
+            update_type=_UPDATE_TYPES[update_type],
+            sequence_number=sequence_number,
+            exchange_id=exchange_id,
+            symbol_id=symbol_id
+        )
+
+    @classmethod
+    def from_binary(cls, data: bytes, offset: int = 0) -> 'MarketUpdate':
         """Create market update from binary data."""
-        unpacked = struct.unpack("!QddfII12s12s", data)
+        timestamp, price, size, sequence_number, symbol, exchange_id, side, update_type, order_id = (
+            cls._PACKER.unpack_from(data, offset)
+        )
         return cls(
-            timestamp=unpacked[0],
-            symbol=unpacked[3].decode().strip('\x00'),
-            price=unpacked[1],
-            size=unpacked[2],
-            side=Side(unpacked[3].decode().strip('\x00')),
-            update_type=UpdateType(unpacked[4].decode().strip('\x00')),
-            sequence_number=unpacked[5],
-            exchange_id=unpacked[6].decode().strip('\x00')
-        )
\ No newline at end of file
+            timestamp=timestamp,
+            symbol=_DECODED[symbol],
+            price=price,
+            size=size,
+            side=_SIDES[side],
+            update_type=_UPDATE_TYPES[update_type],
+            sequence_number=sequence_number,
+            exchange_id=_DECODED[exchange_id],
+            order_id=order_id
+        )
@@ -1,115 +1,237 @@
-from decimal import Decimal
-from typing import Dict, List, Optional, Tuple
+import logging
+from itertools import islice
+from typing import Callable, Dict, List, MutableMapping, Optional, Tuple
+import numpy as np
 from sortedcontainers import SortedDict  # type: ignore
 from ..utils.logging import get_logger
-from .models import OrderBookLevel, OrderBookSnapshot, PriceLevel
-from ..data_ingestion.models import MarketUpdate, Side, UpdateType
+from .models import BatchUpdateError, OrderBookLevel, OrderBookSnapshot, PriceLevel, check_batch_codes
+from ..data_ingestion.models import MarketUpdate, Side, UpdateType, _SIDES, _UPDATE_TYPES
 
 logger = get_logger(__name__)
 
+# Best-tick sentinels for an empty side; real ticks are always positive
+NO_BID = -1
+NO_ASK = 2**63 - 1
+
 class OrderBook:
-    def __init__(self, symbol: str):
+    def __init__(
+        self,
+        symbol: str,
+        tick_size: float = 0.01,
+        ladder: Callable[[], MutableMapping[int, OrderBookLevel]] = SortedDict
+    ):
         self.symbol = symbol
-        self.bids = SortedDict()  # price -> OrderBookLevel
-        self.asks = SortedDict()  # price -> OrderBookLevel
+        self.tick_size = tick_size
+        self._ticks_per_unit = 1.0 / tick_size
+        # Indexed by Side: (bids, asks), each price tick -> OrderBookLevel in an
+        # ordered mapping (SortedDict, or trie.TickLadder)
+        self._sides: Tuple[SortedDict, SortedDict] = (ladder(), ladder())
+        self.best_bid = NO_BID  # Cached best ticks, kept in step with bids/asks
+        self.best_ask = NO_ASK
+        # Order id -> (side, price tick) for updates from order-level feeds
+        self._by_id: Dict[int, Tuple[int, int]] = {}
         self.last_update_time = 0
         self.sequence_number = 0
+        self._snapshot: Optional[OrderBookSnapshot] = None  # Reset on every change
         logger.info(f"Initialized order book for {symbol}")
 
+    @property
+    def bids(self) -> SortedDict:
+        """Bid levels keyed by price tick."""
+        return self._sides[Side.BID]
+
+    @property
+    def asks(self) -> SortedDict:
+        """Ask levels keyed by price tick."""
+        return self._sides[Side.ASK]
+
     def process_update(self, update: MarketUpdate) -> bool:
-        """Process a market update and update the order book accordingly."""
-        try:
-            if update.symbol != self.symbol:
-                logger.warning(f"Received update for wrong symbol: {update.symbol}")
-                return False
-
-            if update.sequence_number <= self.sequence_number:
-                logger.warning(f"Received out-of-sequence update: {update.sequence_number}")
-                return False
-
-            price = Decimal(str(update.price))
-            size = Decimal(str(update.size))
-            book_side = self.bids if update.side == Side.BID else self.asks
-
-            if update.update_type == UpdateType.DELETE:
-                if price in book_side:
-                    del book_side[price]
-            elif update.update_type == UpdateType.MODIFY:
-                if price in book_side:
-                    book_side[price] = OrderBookLevel(
-                        price=price,
-                        orders={str(update.sequence_number): size}
-                    )
-            else:  # ADD
-                book_side[price] = OrderBookLevel(
-                    price=price,
-                    orders={str(update.sequence_number): size}
-                )
+        """Process a market update and update the order book accordingly.
 
-            self.last_update_time = update.timestamp
-            self.sequence_number = update.sequence_number
-            return True
+        Malformed updates raise rather than being logged here; callers on
+        the feed path decide how to handle them.
+        """
+        if update.symbol != self.symbol:
+            if logger.isEnabledFor(logging.WARNING):
+                logger.warning("Received update for wrong symbol: %s", update.symbol)
+            return False
 
-        except Exception as e:
-            logger.error(f"Error processing order book update: {e}")
+        if update.sequence_number <= self.sequence_number:
+            if logger.isEnabledFor(logging.WARNING):
+                logger.warning("Received out-of-sequence update: %d", update.sequence_number)
             return False
 
+        # Integer ticks keep the sorted keys cheap to hash and compare
+        price = round(update.price * self._ticks_per_unit)
+        size = float(update.size)
+        side = update.side
+        update_type = update.update_type
+        order_id = update.order_id
+        # Price-level entries are keyed by negated sequence number so they can
+        # never collide with the non-negative ids of order-level entries
+        entry_key = -update.sequence_number
+
+        if order_id >= 0 and update_type != UpdateType.ADD:
+            # Order-level updates find the order through the id index, not the price
+            located = self._by_id.get(order_id)
+            if located is not None:
+                side, price = located
+                level = self._sides[side][price]
+                if update_type == UpdateType.DELETE:
+                    del self._by_id[order_id]
+                    level.remove_order(order_id)
+                    if not level.orders:
+                        self._remove_level(side, price)
+                else:  # MODIFY
+                    level.add_order(order_id, size)
+        elif update_type == UpdateType.DELETE:
+            if price in self._sides[side]:
+                self._remove_level(side, price)
+        elif update_type == UpdateType.MODIFY:
+            # Price-level updates carry no order id, so a modify sets the whole level's size
+            level = self._sides[side].get(price)
+            if level is not None:
+                self._forget_orders(side, level)
+                level.reset(entry_key, size)
+        else:  # ADD
+            located = self._by_id.pop(order_id, None) if order_id >= 0 else None
+            if located is not None:
+                # A repeated id replaces the order, which may rest at another level
+                old_side, old_price = located
+                old_level = self._sides[old_side][old_price]
+                old_level.remove_order(order_id)
+                if not old_level.orders:
+                    self._remove_level(old_side, old_price)
+            book_side = self._sides[side]
+            level = book_side.get(price)
+            if level is None:
+                level = OrderBookLevel(price=price)
+                book_side[price] = level
+                if side == Side.BID:
+                    if price > self.best_bid:
+                        self.best_bid = price
+                elif price < self.best_ask:
+                    self.best_ask = price
+            if order_id >= 0:
+                self._by_id[order_id] = (side, price)
+                level.add_order(order_id, size)
+            else:
+                level.add_order(entry_key, size)
+
+        self.last_update_time = update.timestamp
+        self.sequence_number = update.sequence_number
+        self._snapshot = None
+        return True
+
+    def _remove_level(self, side: int, price: int) -> None:
+        """Remove a price level, rescanning the best tick if it was the best."""
+        book_side = self._sides[side]
+        self._forget_orders(side, book_side.pop(price))
+        # Only removing the best level needs a rescan of the side
+        if side == Side.BID:
+            if price == self.best_bid:
+                self.best_bid = book_side.peekitem(-1)[0] if book_side else NO_BID
+        elif price == self.best_ask:
+            self.best_ask = book_side.peekitem(0)[0] if book_side else NO_ASK
+
+    def _forget_orders(self, side: int, level: OrderBookLevel) -> None:
+        """Drop id index entries for the orders resting at a level."""
+        if self._by_id:
+            location = (side, level.price)
+            for order_id in level.orders:
+                if self._by_id.get(order_id) == location:
+                    del self._by_id[order_id]
+
+    def apply_batch(
+        self,
+        prices: np.ndarray,
+        sizes: np.ndarray,
+        sides: np.ndarray,
+        types: np.ndarray,
+        seqs: np.ndarray,
+        timestamps: np.ndarray
+    ) -> int:
+        """Apply a batch of updates given as columns; returns how many were applied.
+
+        Sides and types are Side/UpdateType values as integers; a batch with
+        any other code is rejected before the book is touched. A row that
+        fails later raises BatchUpdateError with its index; the rows before
+        it stay applied.
+        """
+        # Checked up front: negative codes would otherwise index _SIDES from the end
+        check_batch_codes(np.asarray(sides), np.asarray(types))
+        rows = zip(
+            prices.tolist(), sizes.tolist(), sides.tolist(),
+            types.tolist(), seqs.tolist(), timestamps.tolist()
+        )
+        applied = 0
+        index = 0
+        try:
+            for index, (price, size, side, update_type, seq, timestamp) in enumerate(rows):
+                applied += self.process_update(MarketUpdate(
+                    timestamp=timestamp,
+                    symbol=self.symbol,
+                    price=price,
+                    size=size,
+                    side=_SIDES[side],
+                    update_type=_UPDATE_TYPES[update_type],
+                    sequence_number=seq,
+                    exchange_id=""
+                ))
+        except Exception as e:
+            raise BatchUpdateError(index, repr(e)) from e
+        return applied
+
     def get_price_levels(self, side: Side, depth: int = 10) -> List[PriceLevel]:
         """Get a list of price levels for the specified side up to the given depth."""
-        book_side = self.bids if side == Side.BID else self.asks
-        levels = []
-        
-        prices = list(book_side.keys())
-        if side == Side.BID:
-            prices.reverse()  # Highest to lowest for bids
-            
-        for price in prices[:depth]:
-            level = book_side[price]
-            levels.append(PriceLevel(
-                price=level.price,
-                size=level.total_size,
-                order_count=level.order_count
-            ))
-            
-        return levels
+        book_side = self._sides[side]
+        # Walk only the first `depth` keys; bids run highest to lowest
+        prices = book_side.irange(reverse=side == Side.BID)
+        return [self._to_price_level(book_side[price]) for price in islice(prices, depth)]
+
+    def _to_price_level(self, level: OrderBookLevel) -> PriceLevel:
+        """Convert a tick-keyed book level to a price level."""
+        return PriceLevel(
+            price=level.price / self._ticks_per_unit,
+            size=level.total_size,
+            order_count=level.order_count
+        )
 
     def get_top_of_book(self) -> Tuple[Optional[PriceLevel], Optional[PriceLevel]]:
         """Get the best bid and ask price levels."""
         best_bid = None
         best_ask = None
         
-        if self.bids:
-            price = self.bids.keys()[-1]  # Highest bid
-            level = self.bids[price]
-            best_bid = PriceLevel(
-                price=level.price,
-                size=level.total_size,
-                order_count=level.order_count
-            )
+        if self.best_bid != NO_BID:
+            best_bid = self._to_price_level(self.bids[self.best_bid])
             
-        if self.asks:
-            price = self.asks.keys()[0]  # Lowest ask
-            level = self.asks[price]
-            best_ask = PriceLevel(
-                price=level.price,
-                size=level.total_size,
-                order_count=level.order_count
-            )
+        if self.best_ask != NO_ASK:
+            best_ask = self._to_price_level(self.asks[self.best_ask])
             
         return best_bid, best_ask
 
     def get_snapshot(self) -> OrderBookSnapshot:
-        """Create a snapshot of the current order book state."""
-        return OrderBookSnapshot(
-            symbol=self.symbol,
-            timestamp=self.last_update_time,
-            bids=self.get_price_levels(Side.BID),
-            asks=self.get_price_levels(Side.ASK),
-            sequence_number=self.sequence_number
-        )
+        """Get a snapshot of the current order book state.
+
+        The snapshot is cached until the book changes, so repeated calls
+        between updates return the same object; treat it as read-only.
+        """
+        if self._snapshot is None:
+            self._snapshot = OrderBookSnapshot(
+                symbol=self.symbol,
+                timestamp=self.last_update_time,
+                bids=self.get_price_levels(Side.BID),
+                asks=self.get_price_levels(Side.ASK),
+                sequence_number=self.sequence_number
+            )
+        return self._snapshot
 
     def clear(self) -> None:
         """Clear all orders from the book."""
-        self.bids.clear()
-        self.asks.clear()
+        for book_side in self._sides:
+            book_side.clear()
+        self.best_bid = NO_BID
+        self.best_ask = NO_ASK
+        self._by_id.clear()
+        self._snapshot = None
         logger.info(f"Cleared order book for {self.symbol}")
\ No newline at end of file
@@ -0,0 +1,245 @@
+import logging
+from typing import List, Optional, Tuple
+import numpy as np
+from ..utils.jit import njit
+from ..utils.logging import get_logger
+from .models import BatchUpdateError, OrderBookSnapshot, PriceLevel, check_batch_codes
+from ..data_ingestion.models import MarketUpdate, Side, UpdateType
+
+logger = get_logger(__name__)
+
+# Plain ints so the compiled kernel sees constants rather than enum members
+BID, ASK = int(Side.BID), int(Side.ASK)
+ADD, MODIFY, DELETE = int(UpdateType.ADD), int(UpdateType.MODIFY), int(UpdateType.DELETE)
+
+@njit(cache=True)
+def _search(ticks: np.ndarray, count: int, tick: int) -> int:
+    """Index of the first of the `count` sorted ticks that is >= tick."""
+    lo = 0
+    hi = count
+    while lo < hi:
+        mid = (lo + hi) // 2
+        if ticks[mid] < tick:
+            lo = mid + 1
+        else:
+            hi = mid
+    return lo
+
+@njit(cache=True)
+def apply_updates(
+    ticks: np.ndarray,
+    sizes: np.ndarray,
+    orders: np.ndarray,
+    counts: np.ndarray,
+    price_ticks: np.ndarray,
+    update_sizes: np.ndarray,
+    sides: np.ndarray,
+    types: np.ndarray,
+    seqs: np.ndarray,
+    last_seq: int
+) -> Tuple[int, int, int, int]:
+    """Apply a batch of updates to sorted per-side level arrays.
+
+    Row 0 of ticks/sizes/orders holds bids and row 1 asks, each sorted by
+    ascending tick over its first counts[side] entries. Mirrors the
+    OrderBook rules: stale sequence numbers are skipped, ADD accumulates
+    into a level, MODIFY resets an existing level and DELETE removes it.
+    Sides must be BID or ASK; rows of any other type are skipped.
+    Returns the last applied sequence number, the index of the last
+    applied update (-1 if none), the number of updates applied and the
+    index of the update that stopped the batch (-1 if all were handled).
+    An ADD needing a new level when its side's arrays are full stops the
+    batch there; the updates before it stay applied.
+    """
+    last_index = -1
+    applied = 0
+    for i in range(price_ticks.shape[0]):
+        seq = seqs[i]
+        if seq <= last_seq:
+            continue
+
+        side = sides[i]
+        tick = price_ticks[i]
+        count = counts[side]
+        pos = _search(ticks[side], count, tick)
+        found = pos < count and ticks[side, pos] == tick
+
+        update_type = types[i]
+        if update_type != ADD and update_type != MODIFY and update_type != DELETE:
+            continue  # Unknown type; never let it fall through to ADD
+
+        if update_type == DELETE:
+            if found:
+                for j in range(pos, count - 1):
+                    ticks[side, j] = ticks[side, j + 1]
+                    sizes[side, j] = sizes[side, j + 1]
+                    orders[side, j] = orders[side, j + 1]
+                counts[side] = count - 1
+        elif update_type == MODIFY:
+            if found:
+                sizes[side, pos] = update_sizes[i]
+                orders[side, pos] = 1
+        elif found:  # ADD at an existing level
+            sizes[side, pos] += update_sizes[i]
+            orders[side, pos] += 1
+        else:  # ADD at a new level
+            if count == ticks.shape[1]:
+                return last_seq, last_index, applied, i
+            for j in range(count, pos, -1):
+                ticks[side, j] = ticks[side, j - 1]
+                sizes[side, j] = sizes[side, j - 1]
+                orders[side, j] = orders[side, j - 1]
+            ticks[side, pos] = tick
+            sizes[side, pos] = update_sizes[i]
+            orders[side, pos] = 1
+            counts[side] = count + 1
+
+        last_seq = seq
+        last_index = i
+        applied += 1
+    return last_seq, last_index, applied, -1
+
+class ArrayOrderBook:
+    """Order book held in sorted NumPy arrays and updated by a JIT kernel.
+
+    Exposes the same read API as OrderBook and adds apply_batch for
+    processing whole columns of updates without per-update Python objects.
+    """
+
+    def __init__(self, symbol: str, tick_size: float = 0.01, capacity: int = 256):
+        self.symbol = symbol
+        self.tick_size = tick_size
+        self._ticks_per_unit = 1.0 / tick_size
+        self._ticks = np.zeros((2, capacity), dtype=np.int64)
+        self._sizes = np.zeros((2, capacity), dtype=np.float64)
+        self._orders = np.zeros((2, capacity), dtype=np.int64)
+        self._counts = np.zeros(2, dtype=np.int64)
+        self.last_update_time = 0
+        self.sequence_number = 0
+        self._snapshot: Optional[OrderBookSnapshot] = None  # Reset on every change
+        logger.info(f"Initialized array order book for {symbol}")
+
+    def apply_batch(
+        self,
+        prices: np.ndarray,
+        sizes: np.ndarray,
+        sides: np.ndarray,
+        types: np.ndarray,
+        seqs: np.ndarray,
+        timestamps: np.ndarray
+    ) -> int:
+        """Apply a batch of updates given as columns; returns how many were applied.
+
+        Sides and types are Side/UpdateType values as integers; a batch with
+        any other code is rejected before the book is touched. Failures
+        raise BatchUpdateError with the index of the offending row.
+        """
+        sides = np.asarray(sides, dtype=np.int64)
+        types = np.asarray(types, dtype=np.int64)
+        check_batch_codes(sides, types)
+        price_ticks = np.rint(np.asarray(prices, dtype=np.float64) * self._ticks_per_unit).astype(np.int64)
+        self._reserve(np.bincount(sides[types == ADD], minlength=2))
+
+        last_seq, last_index, applied, failed = apply_updates(
+            self._ticks, self._sizes, self._orders, self._counts,
+            price_ticks, np.asarray(sizes, dtype=np.float64), sides, types,
+            np.asarray(seqs, dtype=np.int64), self.sequence_number
+        )
+        if applied:
+            self.sequence_number = int(last_seq)
+            self.last_update_time = int(timestamps[last_index])
+            self._snapshot = None
+        if failed >= 0:
+            raise BatchUpdateError(int(failed), "no capacity left for a new level")
+        return int(applied)
+
+    def _reserve(self, new_levels: np.ndarray) -> None:
+        """Grow the level arrays so each side can take `new_levels` more entries."""
+        needed = int((self._counts + new_levels).max())
+        capacity = self._ticks.shape[1]
+        if needed <= capacity:
+            return
+        capacity = max(needed, 2 * capacity)
+        for name in ('_ticks', '_sizes', '_orders'):
+            old = getattr(self, name)
+            grown = np.zeros((2, capacity), dtype=old.dtype)
+            grown[:, :old.shape[1]] = old
+            setattr(self, name, grown)
+
+    def process_update(self, update: MarketUpdate) -> bool:
+        """Process a single market update through the batch kernel."""
+        if update.symbol != self.symbol:
+            if logger.isEnabledFor(logging.WARNING):
+                logger.warning("Received update for wrong symbol: %s", update.symbol)
+            return False
+
+        if update.sequence_number <= self.sequence_number:
+            if logger.isEnabledFor(logging.WARNING):
+                logger.warning("Received out-of-sequence update: %d", update.sequence_number)
+            return False
+
+        return self.apply_batch(
+            np.array([update.price]),
+            np.array([update.size]),
+            np.array([int(update.side)]),
+            np.array([int(update.update_type)]),
+            np.array([update.sequence_number]),
+            np.array([update.timestamp])
+        ) == 1
+
+    def get_price_levels(self, side: Side, depth: int = 10) -> List[PriceLevel]:
+        """Get a list of price levels for the specified side up to the given depth."""
+        code = int(side)
+        count = int(self._counts[code])
+        if code == BID:
+            index = slice(max(count - depth, 0), count)  # Reversed below, highest first
+        else:
+            index = slice(0, min(depth, count))
+
+        ticks = self._ticks[code, index].tolist()
+        sizes = self._sizes[code, index].tolist()
+        orders = self._orders[code, index].tolist()
+        if code == BID:
+            ticks.reverse()
+            sizes.reverse()
+            orders.reverse()
+        return [
+            PriceLevel(price=tick / self._ticks_per_unit, size=size, order_count=order_count)
+            for tick, size, order_count in zip(ticks, sizes, orders)
+        ]
+
+    def _level_at(self, code: int, pos: int) -> PriceLevel:
+        """Convert one array entry to a price level."""
+        return PriceLevel(
+            price=int(self._ticks[code, pos]) / self._ticks_per_unit,
+            size=float(self._sizes[code, pos]),
+            order_count=int(self._orders[code, pos])
+        )
+
+    def get_top_of_book(self) -> Tuple[Optional[PriceLevel], Optional[PriceLevel]]:
+        """Get the best bid and ask price levels."""
+        bid_count, ask_count = int(self._counts[BID]), int(self._counts[ASK])
+        best_bid = self._level_at(BID, bid_count - 1) if bid_count else None
+        best_ask = self._level_at(ASK, 0) if ask_count else None
+        return best_bid, best_ask
+
+    def get_snapshot(self) -> OrderBookSnapshot:
+        """Get a snapshot of the current order book state.
+
+        The snapshot is cached until the book changes; treat it as read-only.
+        """
+        if self._snapshot is None:
+            self._snapshot = OrderBookSnapshot(
+                symbol=self.symbol,
+                timestamp=self.last_update_time,
+                bids=self.get_price_levels(Side.BID),
+                asks=self.get_price_levels(Side.ASK),
+                sequence_number=self.sequence_number
+            )
+        return self._snapshot
+
+    def clear(self) -> None:
+        """Clear all orders from the book."""
+        self._counts[:] = 0
+        self._snapshot = None
+        logger.info(f"Cleared order book for {self.symbol}")
@@ -1,28 +1,95 @@
-from typing import Dict, Optional, Set
+import sys
+from typing import Callable, Dict, Optional, Sequence, Set, Union
+import numpy as np
 from .book import OrderBook
+from .book_numba import ArrayOrderBook
+from .models import BatchUpdateError
 from ..data_ingestion.models import MarketUpdate
 from ..utils.logging import get_logger
 
 logger = get_logger(__name__)
 
+Book = Union[OrderBook, ArrayOrderBook]
+
+class _BookDict(dict):
+    """Symbol -> book mapping that creates missing books on first lookup."""
+
+    def __init__(self, factory: Callable[[str], Book]):
+        super().__init__()
+        self._factory = factory
+
+    def __missing__(self, symbol: str) -> Book:
+        # Interned keys let lookups with interned update symbols match by identity
+        symbol = sys.intern(symbol)
+        book = self[symbol] = self._factory(symbol)
+        logger.info(f"Created new order book for {symbol}")
+        return book
+
 class OrderBookManager:
-    def __init__(self):
-        self.books: Dict[str, OrderBook] = {}
+    def __init__(
+        self,
+        tick_size: float = 0.01,
+        book_factory: Callable[[str, float], Book] = OrderBook
+    ):
+        self.tick_size = tick_size
+        self.book_factory = book_factory
+        self.books: Dict[str, Book] = _BookDict(lambda symbol: book_factory(symbol, tick_size))
         logger.info("Initialized order book manager")
 
-    def get_or_create_book(self, symbol: str) -> OrderBook:
+    def get_or_create_book(self, symbol: str) -> Book:
         """Get an existing order book or create a new one."""
-        if symbol not in self.books:
-            self.books[symbol] = OrderBook(symbol)
-            logger.info(f"Created new order book for {symbol}")
         return self.books[symbol]
 
     def process_update(self, update: MarketUpdate) -> bool:
         """Process an update for the appropriate order book."""
-        book = self.get_or_create_book(update.symbol)
-        return book.process_update(update)
+        return self.books[update.symbol].process_update(update)
+
+    def process_batch(
+        self,
+        symbol: str,
+        prices: np.ndarray,
+        sizes: np.ndarray,
+        sides: np.ndarray,
+        types: np.ndarray,
+        seqs: np.ndarray,
+        timestamps: np.ndarray
+    ) -> int:
+        """Apply a column batch of updates for one symbol; returns how many were applied.
+
+        Sides and types are Side/UpdateType values as integers.
+        Array-backed books apply the whole batch in one compiled call. A
+        failure is logged once with the offending row and re-raised.
+        """
+        book = self.books[symbol]
+        try:
+            return book.apply_batch(prices, sizes, sides, types, seqs, timestamps)
+        except BatchUpdateError as e:
+            logger.exception("Failed to apply batch for %s at row %d of %d", symbol, e.index, len(seqs))
+            raise
+        except Exception:
+            logger.exception("Failed to apply batch for %s (%d rows)", symbol, len(seqs))
+            raise
+
+    def process_rows(self, rows: np.ndarray, symbols: Sequence[str]) -> int:
+        """Apply an UPDATE_DTYPE array spanning many symbols; returns how many were applied.
+
+        Rows are grouped by sym_id, an index into symbols, and each group is
+        applied to its book in arrival order. Rows with a negative sym_id are
+        skipped.
+        """
+        applied = 0
+        symbol_ids = rows['sym_id']
+        for symbol_id in np.unique(symbol_ids).tolist():
+            if symbol_id < 0:
+                continue
+            group = rows[symbol_ids == symbol_id]
+            applied += self.process_batch(
+                symbols[symbol_id], group['price'], group['size'], group['side'],
+                group['type'], group['seq'], group['ts']
+            )
+        return applied
 
-    def get_book(self, symbol: str) -> Optional[OrderBook]:
+    def get_book(self, symbol: str) -> Optional[Book]:
         """Get an order book for a symbol if it exists."""
         return self.books.get(symbol)
 
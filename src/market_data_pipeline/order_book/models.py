@@ -1,34 +1,70 @@
 from dataclasses import dataclass, field
-from decimal import Decimal
 from typing import Dict, List, Optional
-from ..data_ingestion.models import Side, MarketUpdate
+import numpy as np
+from ..data_ingestion.models import Side, MarketUpdate, UpdateType
 
-@dataclass
+@dataclass(slots=True)
 class PriceLevel:
-    price: Decimal
-    size: Decimal = Decimal('0')
+    price: float
+    size: float = 0.0
     order_count: int = 0
     
     def __lt__(self, other):
         return self.price < other.price
 
-@dataclass
+@dataclass(slots=True)
 class OrderBookLevel:
-    price: Decimal
-    orders: Dict[str, Decimal] = field(default_factory=dict)  # order_id -> size
+    price: int  # Price in ticks of the owning book's tick size
+    # order_id -> size; price-level entries use their negated sequence number
+    orders: Dict[int, float] = field(default_factory=dict)
+    _total_size: float = field(default=0.0, init=False, repr=False)
+
+    def __post_init__(self):
+        self._total_size = sum(self.orders.values(), 0.0)
     
     @property
-    def total_size(self) -> Decimal:
-        return sum(self.orders.values(), Decimal('0'))
+    def total_size(self) -> float:
+        return self._total_size
+
+    def add_order(self, order_id: int, size: float) -> None:
+        """Add an order to the level, replacing any existing order with that id."""
+        self._total_size += size - self.orders.get(order_id, 0.0)
+        self.orders[order_id] = size
+
+    def remove_order(self, order_id: int) -> None:
+        """Remove an order from the level if present."""
+        self._total_size -= self.orders.pop(order_id, 0.0)
+
+    def reset(self, order_id: int, size: float) -> None:
+        """Replace all orders at the level with a single order."""
+        self.orders.clear()
+        self.orders[order_id] = size
+        self._total_size = size
     
     @property
     def order_count(self) -> int:
         return len(self.orders)
 
-@dataclass
+@dataclass(slots=True)
 class OrderBookSnapshot:
     symbol: str
     timestamp: int
     bids: List[PriceLevel]
     asks: List[PriceLevel]
-    sequence_number: int
\ No newline at end of file
+    sequence_number: int
+
+
+class BatchUpdateError(Exception):
+    """A row of a column batch could not be applied; `index` is its position."""
+
+    def __init__(self, index: int, reason: str):
+        super().__init__(f"Failed to apply row {index}: {reason}")
+        self.index = index
+
+
+def check_batch_codes(sides: np.ndarray, types: np.ndarray) -> None:
+    """Raise BatchUpdateError at the first row whose side or update type is not a valid code."""
+    invalid = np.flatnonzero((sides < 0) | (sides >= len(Side)) | (types < 0) | (types >= len(UpdateType)))
+    if invalid.size:
+        row = int(invalid[0])
+        raise BatchUpdateError(row, f"invalid side {sides[row]} or update type {types[row]}")
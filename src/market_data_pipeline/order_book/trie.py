@@ -0,0 +1,267 @@
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+
+_BITS = 6  # Each node covers 64 children, one bit per child in its mask
+_FANOUT = 1 << _BITS
+_DIGIT = _FANOUT - 1
+
+def _lowest_bit(mask: int) -> int:
+    """Index of the lowest set bit of a non-zero mask."""
+    return (mask & -mask).bit_length() - 1
+
+class _Node:
+    __slots__ = ('mask', 'children')
+
+    def __init__(self, leaf: bool):
+        self.mask = 0
+        self.children: Optional[List[Optional['_Node']]] = None if leaf else [None] * _FANOUT
+
+class IntOrderedSet:
+    """Ordered set of non-negative ints held in a 64-ary radix trie.
+
+    Every node keeps a bitmask of its present children, so min/max/next/prev
+    are a few bit operations per level. The trie grows in height as larger
+    keys arrive, and the last leaf touched is cached so runs of nearby keys,
+    the common case for price ticks, skip the descent entirely.
+    """
+
+    def __init__(self) -> None:
+        self._height = 1  # Levels including the leaf level
+        self._root = _Node(leaf=True)
+        self._size = 0
+        self._cached_prefix: Optional[int] = None  # key >> _BITS of the cached leaf
+        self._cached_leaf: Optional[_Node] = None
+
+    def __len__(self) -> int:
+        return self._size
+
+    def __bool__(self) -> bool:
+        return self._size > 0
+
+    def __contains__(self, key: int) -> bool:
+        leaf = self._find_leaf(key)
+        return leaf is not None and bool(leaf.mask >> (key & _DIGIT) & 1)
+
+    def __iter__(self) -> Iterator[int]:
+        key = self.min()
+        while key is not None:
+            yield key
+            key = self.next(key)
+
+    def __reversed__(self) -> Iterator[int]:
+        key = self.max()
+        while key is not None:
+            yield key
+            key = self.prev(key)
+
+    def _find_leaf(self, key: int) -> Optional[_Node]:
+        """Leaf that would hold key, or None if its path is absent."""
+        prefix = key >> _BITS
+        if prefix == self._cached_prefix:
+            return self._cached_leaf
+        if key < 0 or key >> (_BITS * self._height):
+            return None
+        node = self._root
+        for shift in range(_BITS * (self._height - 1), 0, -_BITS):
+            node = node.children[(key >> shift) & _DIGIT]
+            if node is None:
+                return None
+        self._cached_prefix, self._cached_leaf = prefix, node
+        return node
+
+    def add(self, key: int) -> bool:
+        """Insert key; returns False if it was already present."""
+        bit = 1 << (key & _DIGIT)
+        if key >> _BITS == self._cached_prefix:
+            # A cached leaf is never empty, so its ancestors already mark it
+            leaf = self._cached_leaf
+        else:
+            if key < 0:
+                raise ValueError(f"IntOrderedSet keys must be non-negative, got {key}")
+            while key >> (_BITS * self._height):
+                self._grow()
+            node = self._root
+            for shift in range(_BITS * (self._height - 1), 0, -_BITS):
+                digit = (key >> shift) & _DIGIT
+                child = node.children[digit]
+                if child is None:
+                    child = node.children[digit] = _Node(leaf=shift == _BITS)
+                node.mask |= 1 << digit
+                node = child
+            leaf = node
+            self._cached_prefix, self._cached_leaf = key >> _BITS, leaf
+        if leaf.mask & bit:
+            return False
+        leaf.mask |= bit
+        self._size += 1
+        return True
+
+    def _grow(self) -> None:
+        """Add a level above the root so the trie covers 64 times more keys."""
+        root = _Node(leaf=False)
+        if self._root.mask:
+            root.children[0] = self._root
+            root.mask = 1
+        self._root = root
+        self._height += 1
+
+    def discard(self, key: int) -> bool:
+        """Remove key if present; returns whether it was removed."""
+        if key < 0 or key >> (_BITS * self._height):
+            return False
+        path = []
+        node = self._root
+        for shift in range(_BITS * (self._height - 1), 0, -_BITS):
+            digit = (key >> shift) & _DIGIT
+            path.append((node, digit))
+            node = node.children[digit]
+            if node is None:
+                return False
+        bit = 1 << (key & _DIGIT)
+        if not node.mask & bit:
+            return False
+        node.mask &= ~bit
+        self._size -= 1
+        if not node.mask and node is self._cached_leaf:
+            self._cached_prefix, self._cached_leaf = None, None
+        # Unlink nodes that became empty so masks only mark live subtrees
+        while not node.mask and path:
+            node, digit = path.pop()
+            node.children[digit] = None
+            node.mask &= ~(1 << digit)
+        return True
+
+    def clear(self) -> None:
+        """Remove all keys."""
+        self.__init__()
+
+    def _descend(self, node: _Node, prefix: int, highest: bool) -> int:
+        """Smallest (or largest) key below a non-empty node whose path is prefix."""
+        while True:
+            mask = node.mask
+            digit = mask.bit_length() - 1 if highest else _lowest_bit(mask)
+            prefix = (prefix << _BITS) | digit
+            if node.children is None:
+                return prefix
+            node = node.children[digit]
+
+    def min(self) -> Optional[int]:
+        """Smallest key, or None if empty."""
+        return self._descend(self._root, 0, highest=False) if self._size else None
+
+    def max(self) -> Optional[int]:
+        """Largest key, or None if empty."""
+        return self._descend(self._root, 0, highest=True) if self._size else None
+
+    def next(self, key: int) -> Optional[int]:
+        """Smallest key greater than key, or None."""
+        if key < 0:
+            return self.min()
+        return self._neighbour(key, higher=True)
+
+    def prev(self, key: int) -> Optional[int]:
+        """Largest key less than key, or None."""
+        if key <= 0:
+            return None
+        if key >> (_BITS * self._height):
+            return self.max()
+        return self._neighbour(key, higher=False)
+
+    def _neighbour(self, key: int, higher: bool) -> Optional[int]:
+        """Nearest key strictly above or below key, for key within the trie's range."""
+        if not self._size or key >> (_BITS * self._height):
+            return None
+        path: List[Tuple[_Node, int]] = []
+        node: Optional[_Node] = self._root
+        shift = _BITS * (self._height - 1)
+        while True:
+            digit = (key >> shift) & _DIGIT
+            if higher:
+                candidates = node.mask >> (digit + 1) << (digit + 1)
+            else:
+                candidates = node.mask & ((1 << digit) - 1)
+            path.append((node, candidates))
+            child = node.children[digit] if node.children is not None else None
+            if child is None:
+                break
+            node = child
+            shift -= _BITS
+
+        # Climb back to the deepest level with a sibling on the wanted side
+        level = len(path)
+        while path:
+            node, candidates = path.pop()
+            level -= 1
+            if candidates:
+                digit = candidates.bit_length() - 1 if not higher else _lowest_bit(candidates)
+                shift = _BITS * (self._height - 1 - level)
+                prefix = ((key >> shift >> _BITS) << _BITS) | digit
+                if node.children is None:
+                    return prefix
+                return self._descend(node.children[digit], prefix, highest=not higher)
+        return None
+
+class TickLadder:
+    """Price tick -> level mapping ordered by an IntOrderedSet.
+
+    Implements the subset of the SortedDict API that OrderBook uses, so it
+    can be passed as OrderBook's ladder to replace a side's SortedDict.
+    """
+
+    def __init__(self) -> None:
+        self._levels: Dict[int, Any] = {}
+        self._ticks = IntOrderedSet()
+
+    def __len__(self) -> int:
+        return len(self._levels)
+
+    def __bool__(self) -> bool:
+        return bool(self._levels)
+
+    def __contains__(self, tick: int) -> bool:
+        return tick in self._levels
+
+    def __getitem__(self, tick: int) -> Any:
+        return self._levels[tick]
+
+    def __setitem__(self, tick: int, level: Any) -> None:
+        if tick not in self._levels:
+            self._ticks.add(tick)
+        self._levels[tick] = level
+
+    def __iter__(self) -> Iterator[int]:
+        return iter(self._ticks)
+
+    def get(self, tick: int, default: Any = None) -> Any:
+        """Level at tick, or default."""
+        return self._levels.get(tick, default)
+
+    def pop(self, tick: int, default: Any = None) -> Any:
+        """Remove and return the level at tick, or default if absent."""
+        level = self._levels.pop(tick, default)
+        self._ticks.discard(tick)
+        return level
+
+    def keys(self) -> Iterator[int]:
+        """Ticks in ascending order."""
+        return iter(self._ticks)
+
+    def peekitem(self, index: int = -1) -> Tuple[int, Any]:
+        """Lowest (index 0) or highest (index -1) tick and its level."""
+        if not self._levels:
+            raise IndexError("peekitem on empty ladder")
+        if index == 0:
+            tick = self._ticks.min()
+        elif index == -1:
+            tick = self._ticks.max()
+        else:
+            raise IndexError("TickLadder.peekitem supports only index 0 or -1")
+        return tick, self._levels[tick]
+
+    def irange(self, reverse: bool = False) -> Iterator[int]:
+        """Iterate all ticks, ascending or descending."""
+        return reversed(self._ticks) if reverse else iter(self._ticks)
+
+    def clear(self) -> None:
+        """Remove all levels."""
+        self._levels.clear()
+        self._ticks.clear()
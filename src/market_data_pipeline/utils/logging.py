@@ -1,13 +1,26 @@
+import copy
 import logging
 import logging.config
 import yaml
 import os
+from functools import lru_cache
 from pathlib import Path
 
+try:
+    from yaml import CSafeLoader as _SafeLoader  # libyaml parser when available
+except ImportError:  # pragma: no cover - depends on how PyYAML was built
+    from yaml import SafeLoader as _SafeLoader  # type: ignore
+
 def get_logger(name: str) -> logging.Logger:
     """Get a logger instance for the given name."""
     return logging.getLogger(name)
 
+@lru_cache(maxsize=4)
+def _load_config(config_path: str, mtime: float) -> dict:
+    """Parse a YAML logging config; cached per path and modification time."""
+    with open(config_path, 'rt') as f:
+        return yaml.load(f, Loader=_SafeLoader)
+
 def setup_logging(
     config_path: str = "config/logging_config.yaml",
     default_level: int = logging.INFO
@@ -17,9 +30,9 @@ def setup_logging(
         # Create logs directory if it doesn't exist
         Path("logs").mkdir(exist_ok=True)
         
-        with open(config_path, 'rt') as f:
-            config = yaml.safe_load(f)
-        logging.config.dictConfig(config)
+        config = _load_config(config_path, os.stat(config_path).st_mtime)
+        # dictConfig consumes parts of what it is given, so keep the cached copy intact
+        logging.config.dictConfig(copy.deepcopy(config))
     except Exception as e:
         print(f"Error in logging configuration: {e}")
         print("Using default logging configuration")
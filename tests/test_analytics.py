@@ -0,0 +1,196 @@
+import pytest
+import numpy as np
+from market_data_pipeline.analytics.engine import AnalyticsEngine
+from market_data_pipeline.analytics.metrics import MarketAnalytics, MarketMetrics, MetricsPool
+from market_data_pipeline.order_book.manager import OrderBookManager
+from market_data_pipeline.data_ingestion.models import MarketUpdate, Side, UpdateType
+from market_data_pipeline.order_book.models import OrderBookSnapshot, PriceLevel
+
+@pytest.fixture
+def analytics():
+    return MarketAnalytics(window_size=10)
+
+def create_update(symbol: str, price: float, side: Side, sequence_number: int) -> MarketUpdate:
+    return MarketUpdate(
+        timestamp=sequence_number,
+        symbol=symbol,
+        price=price,
+        size=10.0,
+        side=side,
+        update_type=UpdateType.ADD,
+        sequence_number=sequence_number,
+        exchange_id="TEST"
+    )
+
+def create_snapshot(bids, asks) -> OrderBookSnapshot:
+    return OrderBookSnapshot(
+        symbol="AAPL",
+        timestamp=1000000,
+        bids=[PriceLevel(price=price, size=size, order_count=1) for price, size in bids],
+        asks=[PriceLevel(price=price, size=size, order_count=1) for price, size in asks],
+        sequence_number=1
+    )
+
+class TestMarketAnalytics:
+    def test_book_metrics(self, analytics):
+        snapshot = create_snapshot(
+            bids=[(100.0, 10.0), (99.0, 30.0)],
+            asks=[(102.0, 20.0), (103.0, 40.0)]
+        )
+        metrics = analytics.calculate_book_metrics(snapshot)
+
+        assert metrics.spread == pytest.approx(2.0)
+        assert metrics.mid_price == pytest.approx(101.0)
+        assert metrics.spread_bps == pytest.approx(2.0 / 101.0 * 10000)
+        assert metrics.rolling_volume == pytest.approx(100.0)
+        assert metrics.volume_weighted_price == pytest.approx(
+            (100.0 * 10 + 99.0 * 30 + 102.0 * 20 + 103.0 * 40) / 100.0
+        )
+        assert metrics.order_imbalance == pytest.approx(-0.2)
+
+    def test_generate_signals(self, analytics):
+        snapshot = create_snapshot(bids=[(100.0, 90.0)], asks=[(101.0, 10.0)])
+        signals = analytics.generate_signals(analytics.calculate_book_metrics(snapshot))
+
+        assert signals['volume_imbalance'] is True
+        assert signals['wide_spread'] is True
+        assert signals['high_volatility'] is False
+
+    def test_batch_metrics(self, analytics):
+        snapshots = [
+            create_snapshot(bids=[(100.0, 10.0), (99.0, 30.0)], asks=[(102.0, 20.0)]),
+            create_snapshot(bids=[(100.0, 10.0)], asks=[]),
+            create_snapshot(bids=[(300.0, 5.0)], asks=[(301.0, 5.0), (302.0, 10.0), (303.0, 1.0)]),
+        ]
+        results = analytics.calculate_batch_metrics(snapshots)
+
+        assert results[0].mid_price == pytest.approx(101.0)
+        assert results[0].order_imbalance == pytest.approx(1 / 3)
+        assert results[1] is None
+        assert results[2].mid_price == pytest.approx(300.5)
+        assert results[2].rolling_volume == pytest.approx(21.0)
+        assert results[2].volume_weighted_price == pytest.approx(
+            (300.0 * 5 + 301.0 * 5 + 302.0 * 10 + 303.0 * 1) / 21.0
+        )
+
+    def test_batch_metrics_without_two_sided_books(self, analytics, caplog):
+        assert analytics.calculate_batch_metrics([]) == []
+        empty = [create_snapshot(bids=[], asks=[]), create_snapshot(bids=[], asks=[])]
+        assert analytics.calculate_batch_metrics(empty) == [None, None]
+        one_sided = [create_snapshot(bids=[(100.0, 10.0)], asks=[])]
+        assert analytics.calculate_batch_metrics(one_sided) == [None]
+        assert "Error" not in caplog.text
+
+    def test_one_sided_book(self, analytics):
+        snapshot = create_snapshot(bids=[(100.0, 10.0)], asks=[])
+        assert analytics.calculate_book_metrics(snapshot) is None
+
+    def test_rolling_statistics(self, analytics):
+        prices = [100.0, 101.0, 100.5, 102.0, 101.2, 99.8, 100.1, 100.9,
+                  101.5, 100.2, 99.9, 101.1, 102.3, 101.7]
+        for i, price in enumerate(prices):
+            analytics.update_time_series(create_update("AAPL", price, Side.BID, i + 1))
+
+        window = np.array(prices[-analytics.window_size:])
+        expected = np.std(np.diff(np.log(window))) * np.sqrt(252)
+        summary = analytics.get_analytics_summary("AAPL")
+        assert summary['volatility'] == pytest.approx(expected)
+        assert summary['moving_average'] == pytest.approx(window.mean())
+        assert summary['volume_ma'] == pytest.approx(10.0)
+
+    @pytest.mark.parametrize("price, size", [
+        (0.0, 10.0), (float("inf"), 10.0), (float("nan"), 10.0),
+        (100.0, -1.0), (100.0, float("inf")), (100.0, float("nan"))
+    ])
+    def test_rejects_invalid_price_or_size(self, analytics, price, size):
+        update = create_update("AAPL", price, Side.BID, 1)
+        update.size = size
+        with pytest.raises(ValueError):
+            analytics.update_time_series(update)
+        assert "AAPL" not in analytics.price_history
+
+    def test_skips_order_id_updates_without_price(self, analytics):
+        cancel = create_update("AAPL", 0.0, Side.BID, 1)
+        cancel.update_type = UpdateType.DELETE
+        cancel.order_id = 501
+        analytics.update_time_series(cancel)
+        assert "AAPL" not in analytics.price_history
+
+    def test_invalid_ticks_do_not_poison_statistics(self):
+        analytics = MarketAnalytics(window_size=5)
+        bad_price = create_update("AAPL", float("inf"), Side.BID, 1)
+        bad_size = create_update("AAPL", 100.0, Side.BID, 2)
+        bad_size.size = float("nan")
+        for update in (bad_price, bad_size):
+            with pytest.raises(ValueError):
+                analytics.update_time_series(update)
+        for i in range(36):
+            analytics.update_time_series(create_update("AAPL", 100.0 + i % 3, Side.BID, i + 3))
+
+        summary = analytics.get_analytics_summary("AAPL")
+        assert all(np.isfinite(value) for value in summary.values())
+        assert summary['volatility'] > 0.0
+
+class TestMetricsPool:
+    def test_reuses_released_instances(self):
+        pool = MetricsPool(capacity=1)
+        metrics = pool.acquire()
+        assert pool.acquire() is not metrics  # Pool exhausted, falls back to allocating
+
+        pool.release(metrics)
+        assert pool.acquire() is metrics
+
+    def test_fills_instance_in_place(self, analytics):
+        out = MarketMetrics()
+        snapshot = create_snapshot(bids=[(100.0, 10.0)], asks=[(102.0, 10.0)])
+        assert analytics.calculate_book_metrics(snapshot, out) is out
+        assert out.mid_price == pytest.approx(101.0)
+
+class TestAnalyticsEngine:
+    @pytest.mark.asyncio
+    async def test_calculate_metrics(self):
+        book_manager = OrderBookManager()
+        engine = AnalyticsEngine(book_manager)
+        updates = [
+            create_update("AAPL", 100.0, Side.BID, 1),
+            create_update("AAPL", 102.0, Side.ASK, 2),
+            create_update("MSFT", 300.0, Side.BID, 1),
+        ]
+        for update in updates:
+            book_manager.process_update(update)
+            engine.process_update(update)
+
+        await engine._calculate_metrics()
+
+        metrics = engine.get_latest_metrics("AAPL")
+        assert metrics.symbol == "AAPL"
+        assert metrics.mid_price == pytest.approx(101.0)
+        assert engine.get_latest_metrics("MSFT") is None  # One-sided book
+
+    @pytest.mark.asyncio
+    async def test_calculate_metrics_without_books(self, caplog):
+        book_manager = OrderBookManager()
+        engine = AnalyticsEngine(book_manager)
+        await engine._calculate_metrics()
+
+        book_manager.get_or_create_book("AAPL")  # Created but still empty
+        await engine._calculate_metrics()
+        assert engine.get_latest_metrics("AAPL") is None
+        assert "Error" not in caplog.text
+
+    def test_process_update_reports_errors(self):
+        engine = AnalyticsEngine(OrderBookManager())
+        engine.process_update(create_update("AAPL", -1.0, Side.BID, 1))  # Logged, not raised
+        assert engine.get_analytics_summary("AAPL")['moving_average'] == 0.0
+
+    @pytest.mark.asyncio
+    async def test_history_is_bounded(self):
+        book_manager = OrderBookManager()
+        engine = AnalyticsEngine(book_manager, history_size=2)
+        book_manager.process_update(create_update("AAPL", 100.0, Side.BID, 1))
+        book_manager.process_update(create_update("AAPL", 102.0, Side.ASK, 2))
+
+        for _ in range(3):
+            await engine._calculate_metrics()
+
+        assert len(engine.metrics_history["AAPL"]) == 2
@@ -1,5 +1,7 @@
+import os
 import pytest
 from market_data_pipeline.config.settings import Config, MarketDataConfig, StorageConfig
+from market_data_pipeline.utils.logging import _load_config, setup_logging
 
 def test_config_loading(config):
     """Test configuration loading and validation."""
@@ -11,4 +13,21 @@ def test_config_loading(config):
     
     assert conf.market_data.symbols == ['AAPL', 'MSFT', 'GOOGL']
     assert conf.market_data.buffer_size == 1000
-    assert conf.storage.compression == 'snappy'
\ No newline at end of file
+    assert conf.storage.compression == 'snappy'
+
+
+def test_logging_config_is_cached(tmp_path, monkeypatch):
+    """Repeated logging setup reuses the parsed config until the file changes."""
+    monkeypatch.chdir(tmp_path)
+    config_path = tmp_path / "logging.yaml"
+    config_path.write_text("version: 1\ndisable_existing_loggers: false\n")
+    _load_config.cache_clear()
+
+    setup_logging(str(config_path))
+    setup_logging(str(config_path))
+    assert _load_config.cache_info().misses == 1
+
+    config_path.write_text("version: 1\ndisable_existing_loggers: false\nroot:\n  level: INFO\n")
+    os.utime(config_path, ns=(0, 10**9))  # Make sure the mtime differs
+    setup_logging(str(config_path))
+    assert _load_config.cache_info().misses == 2
@@ -1,6 +1,7 @@
 import pytest
 import asyncio
-from market_data_pipeline.data_ingestion.models import MarketUpdate, Side, UpdateType
+import sys
+from market_data_pipeline.data_ingestion.models import UPDATE_DTYPE, MarketUpdate, Side, UpdateType
 from market_data_pipeline.data_ingestion.feed_simulator import MarketDataSimulator
 from market_data_pipeline.data_ingestion.buffer import CircularBuffer
 from market_data_pipeline.data_ingestion.feed_handler import FeedHandler
@@ -27,7 +28,88 @@ async def test_market_data_simulator():
         assert isinstance(update.update_type, UpdateType)
 
 @pytest.mark.asyncio
-async def test_feed_handler():
+async def test_simulator_unpaced_producer():
+    simulator = MarketDataSimulator(
+        ["AAPL", "MSFT"], {"AAPL": 150.0, "MSFT": 300.0},
+        update_interval=0, batch_size=64, buffer_size=256
+    )
+    updates = simulator.start()
+
+    sequence_numbers = []
+    async for update in updates:
+        sequence_numbers.append(update.sequence_number)
+        if len(sequence_numbers) >= 5000:
+            break
+    await updates.aclose()
+
+    # Nothing is dropped when the bounded buffer fills up
+    assert sequence_numbers == list(range(1, 5001))
+    assert not simulator._producer.is_alive()
+
+@pytest.mark.asyncio
+async def test_simulator_waits_for_updates_without_polling(monkeypatch):
+    delays = []
+    sleep = asyncio.sleep
+
+    async def recording_sleep(delay, *args, **kwargs):
+        delays.append(delay)
+        return await sleep(delay, *args, **kwargs)
+
+    monkeypatch.setattr(asyncio, "sleep", recording_sleep)
+    simulator = MarketDataSimulator(["AAPL"], {"AAPL": 150.0}, update_interval=0.1)
+    sequence_numbers = []
+    async for update in simulator.start():
+        sequence_numbers.append(update.sequence_number)
+        if len(sequence_numbers) == 3:
+            # Stopping wakes the consumer while it waits on an empty buffer
+            asyncio.get_running_loop().call_later(0.01, simulator.stop)
+
+    assert sequence_numbers == [1, 2, 3]
+    assert all(delay == 0 for delay in delays)
+    assert not simulator._producer.is_alive()
+
+def test_simulator_seed_is_reproducible():
+    symbols = ["AAPL", "MSFT"]
+    initial_prices = {"AAPL": 150.0, "MSFT": 300.0}
+    first = MarketDataSimulator(symbols, initial_prices, batch_size=16, seed=7)
+    second = MarketDataSimulator(symbols, initial_prices, batch_size=16, seed=7)
+
+    # Span several batches so refills are covered too
+    for _ in range(40):
+        a, b = first._next_update(), second._next_update()
+        assert (a.symbol, a.price, a.size, a.side, a.update_type) == \
+            (b.symbol, b.price, b.size, b.side, b.update_type)
+        assert a.price > 0
+
+def test_simulator_interns_symbols():
+    symbol = "".join(["AA", "PL"])  # Built at runtime, so not interned
+    simulator = MarketDataSimulator([symbol], {symbol: 150.0})
+    assert simulator._next_update().symbol is sys.intern("AAPL")
+
+def test_simulator_next_batch():
+    symbols = ["AAPL", "MSFT"]
+    simulator = MarketDataSimulator(symbols, {"AAPL": 150.0, "MSFT": 300.0}, seed=11)
+    rows = simulator.next_batch(100)
+
+    assert rows.dtype == UPDATE_DTYPE
+    assert rows['seq'].tolist() == list(range(1, 101))
+    assert (rows['price'] > 0).all()
+
+    update = MarketUpdate.from_row(rows, 5, symbols, exchange_id="SIM")
+    assert update.symbol == symbols[rows['sym_id'][5]]
+    assert update.price == rows['price'][5]
+    assert update.side == rows['side'][5] and isinstance(update.side, Side)
+    assert update.sequence_number == 6
+    assert simulator._next_update().sequence_number == 101
+
+@pytest.mark.parametrize("column, value", [("side", -1), ("side", 2), ("type", -1), ("type", 3), ("sym_id", -1)])
+def test_from_row_rejects_invalid_codes(column, value):
+    rows = MarketDataSimulator(["AAPL"], {"AAPL": 150.0}, seed=3).next_batch(3)
+    rows[column][1] = value
+    with pytest.raises(ValueError, match="row 1"):
+        MarketUpdate.from_row(rows, 1, ["AAPL"])
+
+def test_feed_handler():
     symbols = {"AAPL", "MSFT"}
     handler = FeedHandler(symbols)
     
@@ -44,7 +126,7 @@ async def test_feed_handler():
     )
     
     # Process update
-    processed_update = await handler.process_update(update)
+    processed_update = handler.process_update(update)
     assert processed_update is not None
     assert processed_update.symbol == "AAPL"
     
@@ -60,5 +142,128 @@ async def test_feed_handler():
         exchange_id="TEST"
     )
     
-    processed_gap_update = await handler.process_update(gap_update)
-    assert processed_gap_update is not None  # Handler should still process the update
\ No newline at end of file
+    processed_gap_update = handler.process_update(gap_update)
+    assert processed_gap_update is not None  # Handler should still process the update
+
+def test_feed_handler_rejects_malformed_updates():
+    handler = FeedHandler({"AAPL"})
+    for price, size in [(float("nan"), 10.0), (-1.0, 10.0), (150.0, float("inf"))]:
+        update = MarketUpdate(
+            timestamp=1,
+            symbol="AAPL",
+            price=price,
+            size=size,
+            side=Side.BID,
+            update_type=UpdateType.ADD,
+            sequence_number=1,
+            exchange_id="TEST"
+        )
+        assert handler.process_update(update) is None
+    assert handler.get_book_snapshot("AAPL").sequence_number == 0
+
+def test_feed_handler_cancels_order_by_id():
+    handler = FeedHandler({"AAPL"})
+    for update_type, price, sequence_number in [(UpdateType.ADD, 150.0, 1), (UpdateType.DELETE, 0.0, 2)]:
+        update = MarketUpdate(
+            timestamp=sequence_number,
+            symbol="AAPL",
+            price=price,
+            size=10.0,
+            side=Side.BID,
+            update_type=update_type,
+            sequence_number=sequence_number,
+            exchange_id="TEST",
+            order_id=501
+        )
+        assert handler.process_update(update) is update
+
+    # The cancel carries no price but still reaches the book
+    snapshot = handler.get_book_snapshot("AAPL")
+    assert snapshot.bids == [] and snapshot.sequence_number == 2
+    assert handler.state["AAPL"].last_seq == 2
+
+def test_feed_handler_symbol_ids():
+    handler = FeedHandler({"AAPL", "MSFT"})
+    aapl_id = handler.symbol_ids["AAPL"]
+    msft_id = handler.symbol_ids["MSFT"]
+
+    tagged = MarketUpdate(
+        timestamp=1000000000,
+        symbol="AAPL",
+        price=150.0,
+        size=100,
+        side=Side.BID,
+        update_type=UpdateType.ADD,
+        sequence_number=1,
+        exchange_id="TEST",
+        symbol_id=aapl_id
+    )
+    assert handler.process_update(tagged) is not None
+    assert handler.state_by_id[aapl_id].last_seq == 1
+
+    # A mismatched id falls back to routing by symbol name
+    mistagged = MarketUpdate(
+        timestamp=1000000001,
+        symbol="MSFT",
+        price=300.0,
+        size=100,
+        side=Side.BID,
+        update_type=UpdateType.ADD,
+        sequence_number=1,
+        exchange_id="TEST",
+        symbol_id=aapl_id
+    )
+    assert handler.process_update(mistagged) is not None
+    assert handler.state_by_id[msft_id].last_seq == 1
+    assert handler.state_by_id[aapl_id].last_seq == 1
+
+def test_circular_buffer():
+    buffer = CircularBuffer(max_size=5)
+    updates = [
+        MarketUpdate(
+            timestamp=i,
+            symbol="AAPL",
+            price=150.0 + i,
+            size=100,
+            side=Side.BID,
+            update_type=UpdateType.ADD,
+            sequence_number=i,
+            exchange_id="TEST"
+        )
+        for i in range(1, 8)
+    ]
+    assert buffer.get_latest() == []
+
+    for update in updates:
+        buffer.add(update)
+
+    assert buffer.get_latest() == [updates[-1]]
+    assert buffer.get_latest(3) == updates[-3:]
+    assert buffer.get_latest(100) == updates[-5:]  # Oldest entries were evicted
+
+def test_binary_round_trip():
+    updates = [
+        MarketUpdate(
+            timestamp=1_700_000_000_000_000_000 + i,
+            symbol="AAPL",
+            price=150.25 + i,
+            size=100.5,
+            side=side,
+            update_type=update_type,
+            sequence_number=2**40 + i,
+            exchange_id="SIM",
+            order_id=order_id
+        )
+        for i, (side, update_type, order_id) in enumerate(
+            [(Side.BID, UpdateType.ADD, -1), (Side.ASK, UpdateType.MODIFY, 7), (Side.ASK, UpdateType.DELETE, 2**40)]
+        )
+    ]
+    assert MarketUpdate.from_binary(updates[0].to_binary()) == updates[0]
+    # Order-level updates keep their id, so a cancel stays an order-level cancel
+    assert MarketUpdate.from_binary(updates[2].to_binary()).order_id == 2**40
+
+    data = MarketUpdate.to_binary_batch(updates)
+    assert len(data) == 3 * MarketUpdate.BINARY_SIZE
+    decoded = [MarketUpdate.from_binary(data, offset)
+               for offset in range(0, len(data), MarketUpdate.BINARY_SIZE)]
+    assert decoded == updates
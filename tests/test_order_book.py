@@ -1,9 +1,13 @@
 # src/market_data_pipeline/order_book/tests/test_order_book.py
 import pytest
-from decimal import Decimal
+import numpy as np
 from market_data_pipeline.order_book.book import OrderBook
+from market_data_pipeline.order_book.book_numba import ArrayOrderBook, apply_updates
+from market_data_pipeline.order_book.trie import IntOrderedSet, TickLadder
 from market_data_pipeline.order_book.manager import OrderBookManager
+from market_data_pipeline.order_book.models import BatchUpdateError
 from market_data_pipeline.data_ingestion.models import MarketUpdate, Side, UpdateType
+from market_data_pipeline.data_ingestion.feed_simulator import MarketDataSimulator
 
 @pytest.fixture
 def order_book():
@@ -32,6 +36,11 @@ def create_update(
         exchange_id="TEST"
     )
 
+def create_order_update(price, size, side, update_type, seq, order_id) -> MarketUpdate:
+    update = create_update("AAPL", price, size, side, update_type, seq)
+    update.order_id = order_id
+    return update
+
 class TestOrderBook:
     def test_add_order(self, order_book):
         update = create_update("AAPL", 100.0, 10.0, Side.BID, UpdateType.ADD, 1)
@@ -39,8 +48,8 @@ class TestOrderBook:
         
         bid_levels = order_book.get_price_levels(Side.BID)
         assert len(bid_levels) == 1
-        assert bid_levels[0].price == Decimal('100.0')
-        assert bid_levels[0].size == Decimal('10.0')
+        assert bid_levels[0].price == 100.0
+        assert bid_levels[0].size == 10.0
 
     def test_modify_order(self, order_book):
         # Add initial order
@@ -52,7 +61,16 @@ class TestOrderBook:
         assert order_book.process_update(modify_update) is True
         
         bid_levels = order_book.get_price_levels(Side.BID)
-        assert bid_levels[0].size == Decimal('5.0')
+        assert bid_levels[0].size == 5.0
+
+    def test_add_to_existing_level(self, order_book):
+        order_book.process_update(create_update("AAPL", 100.0, 10.0, Side.BID, UpdateType.ADD, 1))
+        order_book.process_update(create_update("AAPL", 100.0, 4.0, Side.BID, UpdateType.ADD, 2))
+
+        bid_levels = order_book.get_price_levels(Side.BID)
+        assert len(bid_levels) == 1
+        assert bid_levels[0].size == 14.0
+        assert bid_levels[0].order_count == 2
 
     def test_delete_order(self, order_book):
         # Add order
@@ -79,8 +97,57 @@ class TestOrderBook:
             order_book.process_update(update)
             
         best_bid, best_ask = order_book.get_top_of_book()
-        assert best_bid.price == Decimal('101.0')
-        assert best_ask.price == Decimal('102.0')
+        assert best_bid.price == 101.0
+        assert best_ask.price == 102.0
+
+    def test_top_of_book_after_deleting_best(self, order_book):
+        order_book.process_update(create_update("AAPL", 100.0, 10.0, Side.BID, UpdateType.ADD, 1))
+        order_book.process_update(create_update("AAPL", 101.0, 5.0, Side.BID, UpdateType.ADD, 2))
+        order_book.process_update(create_update("AAPL", 101.0, 0.0, Side.BID, UpdateType.DELETE, 3))
+        assert order_book.get_top_of_book()[0].price == 100.0
+
+        order_book.process_update(create_update("AAPL", 100.0, 0.0, Side.BID, UpdateType.DELETE, 4))
+        assert order_book.get_top_of_book() == (None, None)
+
+    def test_order_id_updates(self, order_book):
+        order_book.process_update(create_order_update(100.0, 10.0, Side.BID, UpdateType.ADD, 1, 501))
+        order_book.process_update(create_order_update(100.0, 5.0, Side.BID, UpdateType.ADD, 2, 502))
+        order_book.process_update(create_order_update(99.0, 7.0, Side.BID, UpdateType.ADD, 3, 503))
+
+        # Modify and delete locate the order by id; the update's price is not used
+        order_book.process_update(create_order_update(0.0, 8.0, Side.BID, UpdateType.MODIFY, 4, 501))
+        order_book.process_update(create_order_update(0.0, 0.0, Side.BID, UpdateType.DELETE, 5, 502))
+        best_bid, _ = order_book.get_top_of_book()
+        assert (best_bid.price, best_bid.size, best_bid.order_count) == (100.0, 8.0, 1)
+
+        # Deleting the last order at the best level removes it
+        order_book.process_update(create_order_update(0.0, 0.0, Side.BID, UpdateType.DELETE, 6, 501))
+        assert order_book.get_top_of_book()[0].price == 99.0
+
+        # A price-level delete drops the index entries for its orders
+        order_book.process_update(create_update("AAPL", 99.0, 0.0, Side.BID, UpdateType.DELETE, 7))
+        assert order_book.bids == {} and order_book._by_id == {}
+
+    def test_price_level_entries_do_not_collide_with_order_ids(self, order_book):
+        order_book.process_update(create_order_update(100.0, 10.0, Side.BID, UpdateType.ADD, 1, 2))
+        # A price-level add whose sequence number equals the resting order's id
+        order_book.process_update(create_update("AAPL", 100.0, 5.0, Side.BID, UpdateType.ADD, 2))
+        best_bid, _ = order_book.get_top_of_book()
+        assert (best_bid.size, best_bid.order_count) == (15.0, 2)
+
+        order_book.process_update(create_order_update(0.0, 0.0, Side.BID, UpdateType.DELETE, 3, 2))
+        best_bid, _ = order_book.get_top_of_book()
+        assert (best_bid.size, best_bid.order_count) == (5.0, 1)
+
+    def test_repeated_order_id_moves_order(self, order_book):
+        order_book.process_update(create_order_update(100.0, 10.0, Side.BID, UpdateType.ADD, 1, 7))
+        order_book.process_update(create_order_update(101.0, 4.0, Side.BID, UpdateType.ADD, 2, 7))
+        levels = order_book.get_price_levels(Side.BID)
+        assert [(level.price, level.size, level.order_count) for level in levels] == [(101.0, 4.0, 1)]
+
+        order_book.process_update(create_order_update(0.0, 0.0, Side.BID, UpdateType.DELETE, 3, 7))
+        assert order_book.bids == {} and order_book._by_id == {}
+        assert order_book.get_top_of_book() == (None, None)
 
     def test_sequence_number_validation(self, order_book):
         # Add order with sequence number 2
@@ -91,11 +158,153 @@ class TestOrderBook:
         update2 = create_update("AAPL", 101.0, 5.0, Side.BID, UpdateType.ADD, 1)
         assert order_book.process_update(update2) is False
 
+    def test_snapshot_cached_until_update(self, order_book):
+        order_book.process_update(create_update("AAPL", 100.0, 10.0, Side.BID, UpdateType.ADD, 1))
+        snapshot = order_book.get_snapshot()
+        assert order_book.get_snapshot() is snapshot
+
+        order_book.process_update(create_update("AAPL", 101.0, 5.0, Side.ASK, UpdateType.ADD, 2))
+        updated = order_book.get_snapshot()
+        assert updated is not snapshot
+        assert len(updated.asks) == 1
+
+        order_book.clear()
+        assert order_book.get_snapshot().bids == []
+
+    def test_prices_round_to_ticks(self):
+        book = OrderBook("AAPL", tick_size=0.05)
+        book.process_update(create_update("AAPL", 100.02, 10.0, Side.BID, UpdateType.ADD, 1))
+        book.process_update(create_update("AAPL", 100.04, 5.0, Side.ASK, UpdateType.ADD, 2))
+
+        assert list(book.bids.keys()) == [2000]
+        best_bid, best_ask = book.get_top_of_book()
+        assert best_bid.price == 100.0
+        assert best_ask.price == 100.05
+
+def random_batch(n: int, seed: int = 7):
+    rng = np.random.default_rng(seed)
+    return (
+        100.0 + rng.integers(-20, 20, n) * 0.01,  # prices
+        rng.uniform(1.0, 100.0, n),               # sizes
+        rng.integers(0, 2, n),                    # sides
+        rng.choice(3, n, p=[0.6, 0.2, 0.2]),      # types
+        np.arange(1, n + 1),                      # sequence numbers
+        np.arange(n) * 1000                       # timestamps
+    )
+
+class TestArrayOrderBook:
+    def test_matches_order_book(self):
+        batch = random_batch(2000)
+        expected, book = OrderBook("AAPL"), ArrayOrderBook("AAPL", capacity=4)
+
+        assert expected.apply_batch(*batch) == 2000
+        assert book.apply_batch(*batch) == 2000
+
+        for side in Side:
+            levels = book.get_price_levels(side, depth=50)
+            reference = expected.get_price_levels(side, depth=50)
+            assert [level.price for level in levels] == pytest.approx([level.price for level in reference])
+            assert [level.size for level in levels] == pytest.approx([level.size for level in reference])
+            assert [level.order_count for level in levels] == [level.order_count for level in reference]
+        assert book.get_top_of_book() == expected.get_top_of_book()
+        assert book.sequence_number == 2000
+        assert book.last_update_time == 1999000
+
+    @pytest.mark.parametrize("column, value", [("sides", -1), ("sides", 2), ("types", 3)])
+    def test_rejects_invalid_codes(self, column, value):
+        prices, sizes, sides, types, seqs, timestamps = random_batch(10)
+        {"sides": sides, "types": types}[column][4] = value
+        book = ArrayOrderBook("AAPL", capacity=2)
+
+        with pytest.raises(BatchUpdateError, match="row 4") as excinfo:
+            book.apply_batch(prices, sizes, sides, types, seqs, timestamps)
+        assert excinfo.value.index == 4
+        assert book.sequence_number == 0
+        assert book.get_top_of_book() == (None, None)  # Nothing applied
+
+    def test_kernel_skips_unknown_types(self):
+        book = ArrayOrderBook("AAPL")
+        last_seq, last_index, applied, failed = apply_updates(
+            book._ticks, book._sizes, book._orders, book._counts,
+            np.array([10000, 10100]), np.array([1.0, 2.0]), np.array([0, 0]),
+            np.array([7, UpdateType.ADD]), np.array([1, 2]), 0
+        )
+        assert (last_seq, last_index, applied, failed) == (2, 1, 1, -1)
+        assert book._counts.tolist() == [1, 0]
+
+    def test_kernel_stops_when_full(self):
+        book = ArrayOrderBook("AAPL", capacity=1)
+        last_seq, last_index, applied, failed = apply_updates(
+            book._ticks, book._sizes, book._orders, book._counts,
+            np.array([10000, 10100, 10200]), np.array([1.0, 2.0, 3.0]), np.array([0, 0, 0]),
+            np.array([UpdateType.ADD, UpdateType.ADD, UpdateType.ADD]), np.array([1, 2, 3]), 0
+        )
+        assert (last_seq, last_index, applied, failed) == (1, 0, 1, 1)
+        assert book._counts.tolist() == [1, 0]
+
+    def test_process_update(self):
+        book = ArrayOrderBook("AAPL")
+        assert book.process_update(create_update("AAPL", 100.0, 10.0, Side.BID, UpdateType.ADD, 1))
+        assert book.process_update(create_update("AAPL", 101.0, 5.0, Side.ASK, UpdateType.ADD, 2))
+        assert not book.process_update(create_update("AAPL", 99.0, 5.0, Side.BID, UpdateType.ADD, 2))
+
+        best_bid, best_ask = book.get_top_of_book()
+        assert best_bid.price == 100.0
+        assert best_ask.price == 101.0
+
+        assert book.process_update(create_update("AAPL", 100.0, 0.0, Side.BID, UpdateType.DELETE, 3))
+        assert book.get_top_of_book()[0] is None
+
+class TestIntOrderedSet:
+    def test_matches_sorted_set(self):
+        rng = np.random.default_rng(3)
+        ticks, reference = IntOrderedSet(), set()
+        for key, remove in zip(rng.integers(0, 300_000, 3000).tolist(), rng.random(3000) < 0.4):
+            if remove:
+                assert ticks.discard(key) == (key in reference)
+                reference.discard(key)
+            else:
+                assert ticks.add(key) == (key not in reference)
+                reference.add(key)
+
+        ordered = sorted(reference)
+        assert list(ticks) == ordered
+        assert list(reversed(ticks)) == ordered[::-1]
+        assert (ticks.min(), ticks.max()) == (ordered[0], ordered[-1])
+        assert ticks.next(ordered[10]) == ordered[11]
+        assert ticks.prev(ordered[10]) == ordered[9]
+        assert ticks.next(ordered[-1]) is None
+        assert ticks.prev(ordered[0]) is None
+
+    def test_cached_leaf_survives_emptying(self):
+        ticks = IntOrderedSet()
+        ticks.add(5)
+        ticks.discard(5)
+        ticks.add(10_000)  # Grows the trie past the emptied leaf
+        ticks.add(6)
+        assert list(ticks) == [6, 10_000]
+
+    def test_rejects_negative_keys(self):
+        with pytest.raises(ValueError):
+            IntOrderedSet().add(-1)
+
+    def test_ladder_book_matches_order_book(self):
+        batch = random_batch(2000)
+        expected, book = OrderBook("AAPL"), OrderBook("AAPL", ladder=TickLadder)
+        expected.apply_batch(*batch)
+        book.apply_batch(*batch)
+
+        for side in Side:
+            assert book.get_price_levels(side, depth=50) == expected.get_price_levels(side, depth=50)
+        assert book.get_top_of_book() == expected.get_top_of_book()
+
 class TestOrderBookManager:
     def test_create_book(self, book_manager):
+        assert book_manager.get_book("AAPL") is None  # Lookups do not create books
         book = book_manager.get_or_create_book("AAPL")
         assert book is not None
         assert book.symbol == "AAPL"
+        assert book_manager.get_or_create_book("AAPL") is book
 
     def test_process_update(self, book_manager):
         update = create_update("AAPL", 100.0, 10.0, Side.BID, UpdateType.ADD, 1)
@@ -104,9 +313,40 @@ class TestOrderBookManager:
         book = book_manager.get_book("AAPL")
         assert book is not None
         best_bid, _ = book.get_top_of_book()
-        assert best_bid.price == Decimal('100.0')
+        assert best_bid.price == 100.0
 
     def test_remove_book(self, book_manager):
         book_manager.get_or_create_book("AAPL")
         book_manager.remove_book("AAPL")
-        assert book_manager.get_book("AAPL") is None
\ No newline at end of file
+        assert book_manager.get_book("AAPL") is None
+
+    def test_process_batch(self):
+        manager = OrderBookManager(book_factory=ArrayOrderBook)
+        assert manager.process_batch("AAPL", *random_batch(100)) == 100
+        assert isinstance(manager.get_book("AAPL"), ArrayOrderBook)
+
+    def test_process_rows(self):
+        symbols = ["AAPL", "MSFT"]
+        rows = MarketDataSimulator(symbols, {"AAPL": 150.0, "MSFT": 300.0}, seed=5).next_batch(500)
+        manager = OrderBookManager(book_factory=ArrayOrderBook)
+        expected = OrderBookManager()
+
+        assert manager.process_rows(rows, symbols) == 500
+        for i in range(len(rows)):
+            expected.process_update(MarketUpdate.from_row(rows, i, symbols))
+
+        for symbol in symbols:
+            assert manager.get_book(symbol).get_top_of_book() == expected.get_book(symbol).get_top_of_book()
+
+    @pytest.mark.parametrize("book_factory", [OrderBook, ArrayOrderBook])
+    @pytest.mark.parametrize("column, value", [("sides", 5), ("sides", -1), ("types", -1)])
+    def test_process_batch_reports_failing_row(self, book_factory, column, value, caplog):
+        manager = OrderBookManager(book_factory=book_factory)
+        prices, sizes, sides, types, seqs, timestamps = random_batch(10)
+        {"sides": sides, "types": types}[column][4] = value
+        with pytest.raises(BatchUpdateError):
+            manager.process_batch("AAPL", prices, sizes, sides, types, seqs, timestamps)
+
+        assert "row 4 of 10" in caplog.text
+        # Both books reject invalid codes before applying any row
+        assert manager.get_book("AAPL").sequence_number == 0